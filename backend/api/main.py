@@ -1,13 +1,18 @@
 # backend/api/main.py
 
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from . import routes
+from ..core import jobs, loaders, metrics
 from ..dependencies import db_connector, llm_connector
 import logging
 
-# Configure basic logging
-logging.basicConfig(level=logging.INFO)
+# Configure basic logging; every record carries the trace ID of the request that produced it
+logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:[%(trace_id)s] %(message)s")
+for handler in logging.getLogger().handlers:
+    handler.addFilter(metrics.TraceIdLogFilter())
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -31,20 +36,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Give each request a trace ID (reusing the caller's if sent) and time it
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    token = metrics.set_trace_id(request.headers.get(metrics.TRACE_ID_HEADER) or metrics.new_trace_id())
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers[metrics.TRACE_ID_HEADER] = metrics.get_trace_id()
+        return response
+    finally:
+        # Label by route template, not raw path, to keep the series count bounded
+        route = request.scope.get("route")
+        metrics.record_request(
+            request.method, route.path if route else "unmatched", status_code, time.perf_counter() - started
+        )
+        metrics.reset_trace_id(token)
+
 # Connect to databases on startup and disconnect on shutdown
 @app.on_event("startup")
 async def startup_event():
     logging.info("Connecting to databases...")
+    # Sync clients serve the ingestion workers, async ones the request handlers
     db_connector.connect_to_neo4j()
     db_connector.connect_to_chroma()
-    # Add this line to initialize the LLM and RAG chain
-    llm_connector.initialize_llm()
+    await db_connector.connect_to_neo4j_async()
+    await db_connector.connect_to_chroma_async()
+    # Load the models in the background so the API starts serving immediately;
+    # /health/ready reports when they are available
+    if llm_connector.llm_settings.LLM_WARM_UP:
+        llm_connector.warm_up()
 
 @app.on_event("shutdown")
-def shutdown_event():
+async def shutdown_event():
+    jobs.shutdown_workers()
+    loaders.shutdown_process_pool()
     logging.info("Disconnecting from databases...")
     db_connector.disconnect_from_neo4j()
     db_connector.disconnect_from_chroma()
+    await db_connector.disconnect_from_neo4j_async()
+    db_connector.disconnect_from_chroma_async()
 
 # Include API routes from the routes.py file
 app.include_router(routes.router)
\ No newline at end of file
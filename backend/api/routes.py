@@ -1,20 +1,120 @@
 # backend/api/routes.py
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, status
-from typing import List
+import os
+import json
+import logging
+import functools
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import Any, AsyncIterator, Dict, List, Optional
 from . import schemas
-from ..core import ingestion, features
-from ..dependencies import llm_connector
+from ..core import ingestion, features, jobs, metrics, result_cache
+from ..core.project_registry import get_project_registry, record_job_update
+from ..core.answer_cache import answer_cache
+from ..dependencies import db_connector, llm_connector
+from ..dependencies.embedding_service import get_embedding_service
 
 router = APIRouter()
 
-# Global variable to store project IDs for this session
-session_projects = {}
+def require_ready_project(project_id: str) -> Dict[str, Any]:
+    """
+    Returns the project's registry record, or raises an HTTP error unless
+    the project exists and no ingestion job is pending for it. A project
+    whose latest job failed after an earlier one completed, such as a
+    failed document addition, keeps serving its previous documents.
+    """
+    project = get_project_registry().get_project(project_id)
+    if project is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found."
+        )
+
+    if project["status"] == jobs.JOB_FAILED and not project["ingested"]:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Project ingestion failed: {project['error']}"
+        )
+    if project["status"] in (jobs.JOB_QUEUED, jobs.JOB_RUNNING):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Project is still being processed."
+        )
+    return project
+
+def format_sse(event: str, data: Any) -> str:
+    """Formats one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def get_feature_cache_key_or_400(feature_name: str):
+    try:
+        return features.get_feature_cache_key(feature_name)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid feature name."
+        )
+
+async def compute_feature(project_id: str, feature_name: str) -> Any:
+    """Dispatches to the correct feature function based on the name."""
+    if feature_name == "clause_simplification":
+        return await features.simplify_clauses(project_id)
+    elif feature_name == "document_classification":
+        return await features.classify_document(project_id)
+    else:
+        return await features.analyze_risks(project_id)
+
+@router.get("/health/live")
+async def liveness():
+    """
+    Liveness probe: the process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+@router.get("/health/ready")
+async def readiness():
+    """
+    Readiness probe: databases are connected and models are loaded.
+    Returns 503 with per-component status until everything is ready.
+    """
+    components = {
+        **await db_connector.check_health(),
+        **llm_connector.get_model_status(),
+    }
+    is_ready = all(state == "ready" for state in components.values())
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if is_ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if is_ready else "not_ready", "components": components}
+    )
+
+@router.get("/metrics")
+async def prometheus_metrics():
+    """
+    Exposes stage latencies, request latencies and LLM token counts in the
+    Prometheus text format.
+    """
+    if not metrics.is_enabled():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Metrics are disabled or prometheus_client is not installed."
+        )
+    content, content_type = metrics.render_metrics()
+    return Response(content=content, media_type=content_type)
+
+@router.get("/llm/info")
+async def llm_info():
+    """
+    Reports the local model, the generation backend it runs on, and its
+    measured tokens per second.
+    """
+    return llm_connector.get_llm_info()
 
-@router.post("/upload/", response_model=schemas.DocumentUploadResponse)
+@router.post("/upload/", response_model=schemas.DocumentUploadResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_documents(files: List[UploadFile] = File(...)):
     """
     Uploads 1 to 10 legal documents for a new project.
+    Processing runs in the background; poll /jobs/{job_id} for progress.
     """
     if not (1 <= len(files) <= 10):
         raise HTTPException(
@@ -22,84 +122,293 @@ async def upload_documents(files: List[UploadFile] = File(...)):
             detail="Please upload between 1 and 10 documents."
         )
 
-    # Ingestion and processing logic (now fully implemented)
-    project_id, processed_docs = await ingestion.process_project(files)
-    session_projects[project_id] = processed_docs
+    project_id, saved_paths = await run_in_threadpool(ingestion.save_project_files, files)
+    processed_docs = [os.path.basename(path) for path in saved_paths]
+
+    registry = get_project_registry()
+    registry.create_project(project_id, processed_docs)
+    try:
+        job_id = jobs.submit_job(
+            project_id, ingestion.process_project, project_id, saved_paths,
+            on_update=record_job_update
+        )
+    except jobs.JobQueueFullError as e:
+        registry.delete_project(project_id)
+        ingestion.delete_project_files(project_id)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e)
+        )
 
     return schemas.DocumentUploadResponse(
         project_id=project_id,
-        message="Documents uploaded and processed successfully.",
+        job_id=job_id,
+        message="Documents uploaded and queued for processing.",
         processed_documents=processed_docs
     )
 
-@router.post("/features/", status_code=status.HTTP_200_OK)
-async def run_feature(request: schemas.FeatureRequest):
+@router.post("/projects/{project_id}/documents/", response_model=schemas.DocumentUploadResponse, status_code=status.HTTP_202_ACCEPTED)
+async def add_project_documents(project_id: str, files: List[UploadFile] = File(...)):
     """
-    Runs a specific feature on an existing project.
+    Adds documents to an existing project. Only the new files are embedded;
+    a file with the same name as an existing document replaces it.
+    Processing runs in the background; poll /jobs/{job_id} for progress.
     """
-    if request.project_id not in session_projects:
+    project = require_ready_project(project_id)
+
+    existing_docs = project["documents"]
+    new_names = [os.path.basename(file.filename) for file in files]
+    updated_docs = [name for name in existing_docs if name not in new_names] + new_names
+    if not files or len(updated_docs) > 10:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found."
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A project can hold between 1 and 10 documents."
         )
 
-    # Dispatch to the correct feature function based on the name
-    if request.feature_name == "clause_simplification":
-        result = await features.simplify_clauses(request.project_id)
-        return {"feature_name": "clause_simplification", "result": result}
-    elif request.feature_name == "document_classification":
-        result = await features.classify_document(request.project_id)
-        return {"feature_name": "document_classification", "result": result}
-    elif request.feature_name == "risk_analysis":
-        result = await features.analyze_risks(request.project_id)
-        return {"feature_name": "risk_analysis", "result": result}
-    else:
+    # Files are staged until the job succeeds; the document list is rolled back if it fails
+    _, saved_paths = await run_in_threadpool(ingestion.save_project_files, files, project_id)
+
+    registry = get_project_registry()
+    registry.set_documents(project_id, updated_docs)
+    try:
+        job_id = jobs.submit_job(
+            project_id, ingestion.add_project_documents, project_id, saved_paths,
+            on_update=functools.partial(record_job_update, previous_documents=existing_docs)
+        )
+    except jobs.JobQueueFullError as e:
+        registry.set_documents(project_id, existing_docs)
+        ingestion.discard_staged_files(saved_paths)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e)
+        )
+
+    return schemas.DocumentUploadResponse(
+        project_id=project_id,
+        job_id=job_id,
+        message="Documents uploaded and queued for processing.",
+        processed_documents=updated_docs
+    )
+
+@router.delete("/projects/{project_id}/documents/{document_name}", response_model=schemas.ProjectDocumentsResponse)
+async def remove_project_document(project_id: str, document_name: str):
+    """
+    Removes a document, its chunks and its graph edges from a project.
+    """
+    project = require_ready_project(project_id)
+
+    if document_name not in project["documents"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found."
+        )
+    if len(project["documents"]) == 1:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid feature name."
+            detail="A project must keep at least one document."
         )
 
-@router.get("/diagram/{project_id}")
-async def get_relationship_diagram(project_id: str):
+    await run_in_threadpool(ingestion.remove_project_document, project_id, document_name)
+    get_project_registry().remove_document(project_id, document_name)
+
+    return schemas.ProjectDocumentsResponse(
+        project_id=project_id,
+        documents=[name for name in project["documents"] if name != document_name]
+    )
+
+@router.get("/jobs/{job_id}", response_model=schemas.JobStatusResponse)
+async def get_job_status(job_id: str):
     """
-    Gets the relationship diagram data for a project.
+    Reports the stage and progress of a background ingestion job.
     """
-    if project_id not in session_projects:
+    # Jobs from other workers or before a restart are only in the registry
+    job = jobs.get_job(job_id) or get_project_registry().get_job(job_id)
+    if not job:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found."
+            detail="Job not found."
+        )
+
+    return schemas.JobStatusResponse(**job)
+
+@router.post("/features/", status_code=status.HTTP_200_OK)
+async def run_feature(request: schemas.FeatureRequest):
+    """
+    Runs a specific feature on an existing project.
+    """
+    require_ready_project(request.project_id)
+
+    model_id, prompt_hash = get_feature_cache_key_or_400(request.feature_name)
+
+    # A stored result stays valid until the project's documents change
+    # (which clears it) or the model or prompt template changes
+    cache = result_cache.get_result_cache()
+    cached_result = cache.get(request.project_id, request.feature_name, model_id, prompt_hash)
+    if cached_result is not None:
+        return {"feature_name": request.feature_name, "result": cached_result, "cached": True}
+
+    result = await compute_feature(request.project_id, request.feature_name)
+
+    if features.is_cacheable_result(request.feature_name, result):
+        cache.put(request.project_id, request.feature_name, model_id, prompt_hash, result)
+
+    return {"feature_name": request.feature_name, "result": result, "cached": False}
+
+@router.post("/features/stream")
+async def stream_feature(request: schemas.FeatureRequest):
+    """
+    Runs a feature and streams its output as server-sent events.
+    Clause simplification emits one `result` event per clause as batches
+    finish, or straight away when cached; other features emit a single
+    `result` event. A `done` event closes the stream.
+    """
+    require_ready_project(request.project_id)
+    model_id, prompt_hash = get_feature_cache_key_or_400(request.feature_name)
+    cache = result_cache.get_result_cache()
+
+    async def event_stream() -> AsyncIterator[str]:
+        cached_result = cache.get(request.project_id, request.feature_name, model_id, prompt_hash)
+        if cached_result is not None:
+            # Cached results arrive in the same event shape as freshly computed ones
+            if request.feature_name == "clause_simplification":
+                for index, row in enumerate(cached_result):
+                    yield format_sse("result", {"index": index, "item": row, "cached": True})
+            else:
+                yield format_sse("result", {"item": cached_result, "cached": True})
+            yield format_sse("done", {})
+            return
+
+        try:
+            if request.feature_name == "clause_simplification":
+                rows = {}
+                async for index, row in features.iter_simplified_clauses(request.project_id):
+                    rows[index] = row
+                    yield format_sse("result", {"index": index, "item": row})
+                result = [rows[index] for index in sorted(rows)]
+            else:
+                result = await compute_feature(request.project_id, request.feature_name)
+                yield format_sse("result", {"item": result})
+        except Exception as e:
+            logging.error(f"Streaming feature {request.feature_name} failed: {e}")
+            yield format_sse("error", {"detail": str(e)})
+            return
+
+        if features.is_cacheable_result(request.feature_name, result):
+            cache.put(request.project_id, request.feature_name, model_id, prompt_hash, result)
+        yield format_sse("done", {})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@router.get("/diagram/{project_id}", response_model=schemas.DiagramResponse)
+async def get_relationship_diagram(
+    project_id: str,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1)
+):
+    """
+    Gets one page of the relationship diagram data for a project.
+    """
+    require_ready_project(project_id)
+
+    try:
+        diagram_data = await features.get_relationship_diagram(project_id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
-    
-    diagram_data = await features.get_relationship_diagram(project_id)
     return diagram_data
 
+def source_document_names(sources: List[dict]) -> List[str]:
+    """Returns the distinct document names in retrieved chunk metadata, in order."""
+    names = []
+    for metadata in sources:
+        name = metadata.get('source_document')
+        if name and name not in names:
+            names.append(name)
+    return names
+
 @router.post("/chatbot/", response_model=schemas.ChatQueryResponse)
 async def ask_chatbot(request: schemas.ChatQueryRequest):
     """
-    Answers a user query using the RAG chatbot.
+    Answers a user query using the RAG chatbot. Near-identical questions
+    about the same project are answered from the semantic answer cache.
     """
-    if request.project_id not in session_projects:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found."
+    revision = require_ready_project(request.project_id)["revision"]
+
+    embeddings = await run_in_threadpool(get_embedding_service)
+    query_embedding = await run_in_threadpool(embeddings.embed_query, request.query)
+    cached = answer_cache.lookup(request.project_id, revision, query_embedding)
+    if cached:
+        return schemas.ChatQueryResponse(
+            answer=cached["answer"],
+            source_documents=source_document_names(cached["sources"]),
+            cached=True
         )
 
-    # Get the RAG chain and run the query
-    rag_chain = llm_connector.get_rag_chain()
+    # Get the project's RAG chain and run the query
+    rag_chain = await run_in_threadpool(llm_connector.get_rag_chain, request.project_id)
     if not rag_chain:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="RAG chain not initialized. Please check backend logs."
         )
 
-    # Correct way to invoke the RAG chain
-    response = rag_chain.invoke({"query": request.query})
-    
+    response = await run_in_threadpool(rag_chain.invoke, {"query": request.query})
+
     # The response from the RAG chain is a dictionary
     answer = response.get('result', "Could not find an answer.")
-    # You would need to parse this for source documents
-    
+    sources = [doc.metadata for doc in response.get('source_documents', [])]
+    answer_cache.store(request.project_id, revision, request.query, query_embedding, answer, sources)
+
     return schemas.ChatQueryResponse(
         answer=answer,
-        source_documents=["document1.pdf", "document2.docx"] # Placeholder for now
-    )
\ No newline at end of file
+        source_documents=source_document_names(sources)
+    )
+
+@router.post("/chatbot/stream")
+async def stream_chatbot(request: schemas.ChatQueryRequest):
+    """
+    Answers a user query as server-sent events: a `sources` event with the
+    retrieved document metadata, then one `token` event per generated text
+    piece, then `done`. A cached answer arrives as a single `token` event.
+    """
+    revision = require_ready_project(request.project_id)["revision"]
+
+    embeddings = await run_in_threadpool(get_embedding_service)
+    query_embedding = await run_in_threadpool(embeddings.embed_query, request.query)
+    cached = answer_cache.lookup(request.project_id, revision, query_embedding)
+    if cached:
+        async def cached_stream() -> AsyncIterator[str]:
+            yield format_sse("sources", {"source_documents": cached["sources"], "cached": True})
+            yield format_sse("token", {"text": cached["answer"]})
+            yield format_sse("done", {})
+
+        return StreamingResponse(cached_stream(), media_type="text/event-stream")
+
+    retriever = await run_in_threadpool(llm_connector.get_retriever, request.project_id)
+    if not retriever:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="RAG chain not initialized. Please check backend logs."
+        )
+
+    source_docs = await run_in_threadpool(retriever.invoke, request.query)
+    sources = [doc.metadata for doc in source_docs]
+    prompt = llm_connector.build_rag_prompt(source_docs, request.query)
+
+    async def event_stream() -> AsyncIterator[str]:
+        yield format_sse("sources", {"source_documents": sources})
+        pieces = []
+        try:
+            async for text in iterate_in_threadpool(llm_connector.stream_generate(prompt)):
+                pieces.append(text)
+                yield format_sse("token", {"text": text})
+        except Exception as e:
+            logging.error(f"Streaming chatbot answer failed: {e}")
+            yield format_sse("error", {"detail": str(e)})
+            return
+        answer_cache.store(request.project_id, revision, request.query, query_embedding, "".join(pieces), sources)
+        yield format_sse("done", {})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
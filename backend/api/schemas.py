@@ -8,9 +8,54 @@ class DocumentUploadResponse(BaseModel):
     Schema for the response after documents have been uploaded and processed.
     """
     project_id: str
+    job_id: str
     message: str
     processed_documents: List[str]
 
+class ProjectDocumentsResponse(BaseModel):
+    """
+    Schema for a project's current document list after a change.
+    """
+    project_id: str
+    documents: List[str]
+
+class JobStatusResponse(BaseModel):
+    """
+    Schema for polling the progress of a background ingestion job.
+    """
+    job_id: str
+    project_id: str
+    status: str = Field(..., description="One of queued, running, completed or failed.")
+    stage: str = Field(..., description="The pipeline stage currently running.")
+    progress: float = Field(..., description="Percent of the pipeline completed, from 0 to 100.")
+    error: Optional[str] = None
+
+class DiagramNode(BaseModel):
+    """
+    Schema for one node of a project's relationship diagram.
+    """
+    id: str
+    label: str
+    type: str = Field(..., description="Project or Document.")
+
+class DiagramEdge(BaseModel):
+    """
+    Schema for one edge of a project's relationship diagram, by node ID.
+    """
+    source: str
+    target: str
+    type: str
+
+class DiagramResponse(BaseModel):
+    """
+    Schema for one page of a project's relationship diagram. Nodes are only
+    sent on the first page; pass `next_cursor` back to fetch the next one.
+    """
+    project_id: str
+    nodes: List[DiagramNode]
+    edges: List[DiagramEdge]
+    next_cursor: Optional[str] = None
+
 class ChatQueryRequest(BaseModel):
     """
     Schema for a user's chat query.
@@ -24,6 +69,7 @@ class ChatQueryResponse(BaseModel):
     """
     answer: str
     source_documents: List[str]
+    cached: bool = False
 
 class FeatureRequest(BaseModel):
     """
@@ -44,6 +90,7 @@ class SimplifiedClause(BaseModel):
 class RiskAnalysis(BaseModel):
     """Schema for a risk analysis output."""
     clause_id: str
+    source_document: Optional[str] = None
     risk_level: str = Field(..., description="Risk level (e.g., Low, Medium, High).")
     explanation: str = Field(..., description="Explanation of why the clause is a risk.")
     conflicts_with: List[str] = Field(..., description="List of other documents or clauses it conflicts with.")
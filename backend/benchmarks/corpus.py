@@ -0,0 +1,56 @@
+# backend/benchmarks/corpus.py
+
+import os
+import random
+from typing import List
+
+PARTIES = ["Acme Corp", "Globex Ltd", "Initech LLC", "Umbrella Holdings", "Stark Industries"]
+SUBJECTS = [
+    "Confidential Information", "the Premises", "the Services", "the Employee",
+    "the Licensed Software", "the Deliverables", "any Personal Data",
+]
+OBLIGATIONS = [
+    "shall not disclose", "shall indemnify and hold harmless the other party in respect of",
+    "may terminate this Agreement with thirty (30) days written notice regarding",
+    "shall pay all fees within fifteen (15) days for", "shall maintain adequate insurance covering",
+    "warrants that it has full authority to grant rights in", "shall return or destroy",
+]
+QUALIFIERS = [
+    "except as required by law", "notwithstanding anything to the contrary herein",
+    "subject to Section {section}", "as amended by any subsequent agreement",
+    "to the extent permitted by applicable law", "in accordance with the schedule attached",
+]
+
+
+def make_clause(rng: random.Random, section: str, other_documents: List[str]) -> str:
+    sentences = []
+    for _ in range(rng.randint(3, 7)):
+        sentence = (
+            f"{rng.choice(PARTIES)} {rng.choice(OBLIGATIONS)} {rng.choice(SUBJECTS)}, "
+            f"{rng.choice(QUALIFIERS).format(section=rng.randint(1, 20))}."
+        )
+        sentences.append(sentence)
+    if other_documents and rng.random() < 0.3:
+        sentences.append(f"This clause is amended by {rng.choice(other_documents)}.")
+    return f"{section} " + " ".join(sentences)
+
+
+def write_corpus(directory: str, document_count: int, clauses_per_document: int, seed: int = 0) -> List[str]:
+    """
+    Writes `document_count` synthetic contracts as text files and returns
+    their paths. Some clauses mention other documents by file name so the
+    knowledge graph stage has edges to write. Output depends only on the seed.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    names = [f"contract_{index:03d}.txt" for index in range(document_count)]
+
+    paths = []
+    for name in names:
+        others = [other for other in names if other != name]
+        clauses = [make_clause(rng, f"{index + 1}.", others) for index in range(clauses_per_document)]
+        path = os.path.join(directory, name)
+        with open(path, "w", encoding="utf-8") as corpus_file:
+            corpus_file.write(f"AGREEMENT {name}\n\n" + "\n\n".join(clauses) + "\n")
+        paths.append(path)
+    return paths
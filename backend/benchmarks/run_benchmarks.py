@@ -0,0 +1,324 @@
+# backend/benchmarks/run_benchmarks.py
+"""
+Times ingestion and query handling over synthetic corpora of increasing
+size, using local stand-ins for every external service: an in-process
+Chroma client, a recording fake Neo4j driver and a deterministic stub LLM.
+
+    python -m backend.benchmarks.run_benchmarks --sizes 1,5,10 --output bench.json
+    python -m backend.benchmarks.run_benchmarks --baseline bench.json
+
+With --baseline the run exits non-zero if any timing regressed by more
+than --tolerance.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List
+
+from .corpus import write_corpus
+
+FEATURE_NAMES = ["clause_simplification", "document_classification", "risk_analysis"]
+CHAT_QUERIES = [
+    "Who may terminate the agreement and with how much notice?",
+    "What does Section 5 say about confidential information?",
+    "Which party indemnifies the other?",
+    "When are fees payable?",
+    "What insurance must be maintained?",
+    "Which clauses are amended by other documents?",
+]
+
+
+# --- Stage timing ---
+class StageTimer:
+    """Accumulates wall time per stage by temporarily wrapping functions."""
+
+    def __init__(self):
+        self.totals: Dict[str, float] = defaultdict(float)
+        # The part of each total spent producing iterator items, as opposed to the call itself
+        self.iterated: Dict[str, float] = defaultdict(float)
+
+    def _timed_iterator(self, iterator: Iterator, stage: str) -> Iterator:
+        # Only time spent producing items counts, not the consumer's work between them
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self._add_iterated(stage, time.perf_counter() - started)
+                return
+            self._add_iterated(stage, time.perf_counter() - started)
+            yield item
+
+    def _add_iterated(self, stage: str, seconds: float) -> None:
+        self.totals[stage] += seconds
+        self.iterated[stage] += seconds
+
+    @contextmanager
+    def wrap(self, owner: Any, name: str, stage: str, returns_iterator: bool = False):
+        original = getattr(owner, name)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = original(*args, **kwargs)
+            finally:
+                self.totals[stage] += time.perf_counter() - started
+            return self._timed_iterator(iter(result), stage) if returns_iterator else result
+
+        setattr(owner, name, timed)
+        try:
+            yield
+        finally:
+            setattr(owner, name, original)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+# --- Environment ---
+def configure_environment(data_dir: str) -> None:
+    """Points every on-disk store at a scratch directory. Must run before the backend is imported."""
+    os.environ["LEXICAL_INDEX_DIR"] = os.path.join(data_dir, "lexical_index")
+    os.environ["PROJECT_REGISTRY_PATH"] = os.path.join(data_dir, "projects.sqlite3")
+    os.environ["RESULT_CACHE_PATH"] = os.path.join(data_dir, "feature_results.sqlite3")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(data_dir, "embedding_cache.sqlite3")
+
+
+def install_stand_ins(data_dir: str, use_model_embeddings: bool, seconds_per_token: float):
+    """Replaces the external services with local stand-ins and returns the fake Neo4j driver."""
+    import chromadb
+
+    from ..core import ingestion
+    from ..dependencies import db_connector, embedding_service, llm_connector
+    from .stubs import FakeNeo4jDriver, HashingEmbeddingService, StubLLM
+
+    ingestion.UPLOAD_DIR = os.path.join(data_dir, "uploads")
+    db_connector.chroma_client = chromadb.EphemeralClient()
+    db_connector.neo4j_driver = FakeNeo4jDriver()
+    if not use_model_embeddings:
+        embedding_service._embedding_service = HashingEmbeddingService()
+    llm_connector.local_llm = StubLLM(seconds_per_token=seconds_per_token)
+    llm_connector.llm_status = "ready"
+    return db_connector.neo4j_driver
+
+
+# --- Benchmarks ---
+def benchmark_ingestion(project_id: str, paths: List[str], graph_driver) -> Dict[str, Any]:
+    """Runs process_project once, timing each of its stages."""
+    from ..core import ingestion, lexical_index, near_duplicates
+    from ..dependencies.llm_connector import ChromaEmbeddingFunction
+
+    timer = StageTimer()
+    graph_before = graph_driver.snapshot()
+    with ExitStack() as stack:
+        stack.enter_context(timer.wrap(ingestion, "iter_document_pages", "load", returns_iterator=True))
+        stack.enter_context(timer.wrap(ingestion, "split_pages", "split", returns_iterator=True))
+        stack.enter_context(timer.wrap(near_duplicates, "mark_near_duplicates", "near_duplicates"))
+        stack.enter_context(timer.wrap(ChromaEmbeddingFunction, "__call__", "embed"))
+        stack.enter_context(timer.wrap(ingestion, "populate_vector_db", "vector_db"))
+        stack.enter_context(timer.wrap(lexical_index, "index_chunks", "lexical_index"))
+        stack.enter_context(timer.wrap(ingestion, "populate_knowledge_graph", "graph_write"))
+
+        started = time.perf_counter()
+        chunk_counts = ingestion.process_project(project_id, paths)
+        total = time.perf_counter() - started
+
+    stages = dict(timer.totals)
+    # Splitting pulls pages from the loader as it goes; report the split on its
+    # own. Only page production happens inside it: the loader call itself,
+    # which imports and opens the file, runs before the split starts.
+    stages["split"] = max(stages.get("split", 0.0) - timer.iterated.get("load", 0.0), 0.0)
+    # Embedding happens inside the Chroma upsert; report the insert on its own
+    stages["vector_insert"] = max(stages.pop("vector_db", 0.0) - stages.get("embed", 0.0), 0.0)
+    stages["total"] = total
+    graph_after = graph_driver.snapshot()
+    return {
+        "chunks": sum(chunk_counts.values()),
+        "seconds": stages,
+        "graph": {key: graph_after[key] - graph_before[key] for key in graph_after},
+    }
+
+
+def register_ready_project(project_id: str, documents: List[str]) -> None:
+    """Records the project as fully ingested so the route handlers accept it."""
+    from ..core import jobs
+    from ..core.project_registry import get_project_registry
+
+    registry = get_project_registry()
+    registry.create_project(project_id, documents)
+    registry.update_job({
+        "job_id": str(uuid.uuid4()), "project_id": project_id, "status": jobs.JOB_COMPLETED,
+        "stage": "done", "progress": 100.0, "error": None,
+    })
+
+
+async def benchmark_features(project_id: str) -> Dict[str, Dict[str, float]]:
+    """Times each /features/ handler cold (empty result cache) and warm."""
+    from ..api import routes, schemas
+    from ..core import result_cache
+
+    timings = {}
+    for feature_name in FEATURE_NAMES:
+        result_cache.get_result_cache().invalidate_project(project_id)
+        request = schemas.FeatureRequest(project_id=project_id, feature_name=feature_name)
+        runs = {}
+        for run_name in ("cold", "warm"):
+            started = time.perf_counter()
+            await routes.run_feature(request)
+            runs[run_name] = time.perf_counter() - started
+        timings[feature_name] = runs
+    return timings
+
+
+async def benchmark_chatbot(project_id: str, rounds: int) -> Dict[str, Any]:
+    """Times the /chatbot/ handler on distinct questions, then on repeats served from the answer cache."""
+    from ..api import routes, schemas
+    from ..core.answer_cache import answer_cache
+
+    answer_cache.invalidate_project(project_id)
+    timings = {"cold": [], "warm": []}
+    for round_index in range(rounds):
+        for query in CHAT_QUERIES:
+            request = schemas.ChatQueryRequest(project_id=project_id, query=query)
+            started = time.perf_counter()
+            await routes.ask_chatbot(request)
+            timings["warm" if round_index else "cold"].append(time.perf_counter() - started)
+    return {run_name: summarize(samples) for run_name, samples in timings.items() if samples}
+
+
+def run(args: argparse.Namespace, data_dir: str) -> Dict[str, Any]:
+    graph_driver = install_stand_ins(data_dir, args.model_embeddings, args.llm_seconds_per_token)
+
+    results = []
+    for size in args.sizes:
+        project_id = str(uuid.uuid4())
+        paths = write_corpus(
+            os.path.join(data_dir, "corpus", project_id), size, args.clauses_per_document, seed=args.seed
+        )
+        logging.warning(f"Benchmarking {size} documents...")
+
+        ingestion_result = benchmark_ingestion(project_id, paths, graph_driver)
+        register_ready_project(project_id, [os.path.basename(path) for path in paths])
+        results.append({
+            "documents": size,
+            "ingestion": ingestion_result,
+            "features": asyncio.run(benchmark_features(project_id)),
+            "chatbot": asyncio.run(benchmark_chatbot(project_id, args.chat_rounds)),
+        })
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "config": {
+            "sizes": args.sizes,
+            "clauses_per_document": args.clauses_per_document,
+            "chat_rounds": args.chat_rounds,
+            "seed": args.seed,
+            "embeddings": "model" if args.model_embeddings else "hashing",
+            "llm_seconds_per_token": args.llm_seconds_per_token,
+        },
+        "results": results,
+    }
+
+
+# --- Regression check ---
+def flatten_timings(report: Dict[str, Any]) -> Dict[str, float]:
+    """Maps 'documents=N/path/to/timing' to seconds for every timing in a report."""
+    flat = {}
+
+    def walk(prefix: str, value: Any) -> None:
+        if isinstance(value, dict):
+            for key, child in value.items():
+                walk(f"{prefix}/{key}", child)
+        elif isinstance(value, float):
+            flat[prefix] = value
+
+    for result in report["results"]:
+        prefix = f"documents={result['documents']}"
+        walk(f"{prefix}/ingestion", result["ingestion"]["seconds"])
+        walk(f"{prefix}/features", result["features"])
+        walk(f"{prefix}/chatbot", result["chatbot"])
+    return flat
+
+
+def find_regressions(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, min_delta: float) -> List[str]:
+    current, previous = flatten_timings(report), flatten_timings(baseline)
+    regressions = []
+    for key, seconds in sorted(current.items()):
+        before = previous.get(key)
+        if before is None:
+            continue
+        if seconds > before * (1 + tolerance) and seconds - before > min_delta:
+            regressions.append(f"{key}: {before:.4f}s -> {seconds:.4f}s")
+    return regressions
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")], default=[1, 5, 10],
+                        help="Comma-separated corpus sizes, in documents.")
+    parser.add_argument("--clauses-per-document", type=int, default=60)
+    parser.add_argument("--chat-rounds", type=int, default=2,
+                        help="Passes over the chat questions; passes after the first hit the answer cache.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model-embeddings", action="store_true",
+                        help="Use the configured embedding model instead of the hashing stand-in.")
+    parser.add_argument("--llm-seconds-per-token", type=float, default=0.0,
+                        help="Simulated generation time per output word of the stub LLM.")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    parser.add_argument("--baseline", help="A previous JSON report to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative slowdown before a timing counts as a regression.")
+    parser.add_argument("--min-delta", type=float, default=0.005,
+                        help="Ignore slowdowns smaller than this many seconds.")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory(prefix="clausewise-bench-") as data_dir:
+        configure_environment(data_dir)
+        report = run(args, data_dir)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            regressions = find_regressions(report, json.load(baseline_file), args.tolerance, args.min_delta)
+        for regression in regressions:
+            logging.error(f"Regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
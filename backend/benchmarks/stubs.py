@@ -0,0 +1,157 @@
+# backend/benchmarks/stubs.py
+
+import hashlib
+import json
+import math
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import LLM
+
+from ..core.features import CLASSIFICATION_LABELS
+
+
+# --- Deterministic embeddings ---
+class HashingEmbeddingService(Embeddings):
+    """
+    Stand-in for EmbeddingService: hashes words into a fixed-size vector so
+    runs are deterministic and need no model download.
+    """
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+        self.model_name = f"hashing-{dimensions}"
+        self.device = "cpu"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector))
+        return [value / norm for value in vector] if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+# --- Deterministic LLM ---
+class StubLLM(LLM):
+    """
+    Returns a canned answer shaped like what each feature prompt asks for,
+    chosen by hashing the prompt. `seconds_per_token` simulates generation
+    time so prompt-size effects still show up in timings.
+    """
+
+    seconds_per_token: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-stub"
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> str:
+        digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+        if "Legal Clause:" in prompt:
+            clause = prompt.rsplit("Legal Clause:", 1)[1].strip()
+            words = clause.split()
+            output = json.dumps({
+                "original_text": clause,
+                "simplified_text": " ".join(words[:40]),
+                "key_terms": sorted(set(words))[:5],
+            })
+        elif '"risk_level"' in prompt:
+            output = json.dumps({
+                "risk_level": ["None", "Low", "Medium", "High"][digest % 4],
+                "explanation": "Benchmark assessment of the clause.",
+                "conflicts_with": [1] if "1. From" in prompt else [],
+            })
+        elif "classify the document" in prompt:
+            output = json.dumps({"document_type": CLASSIFICATION_LABELS[digest % len(CLASSIFICATION_LABELS)]})
+        else:
+            output = f"Benchmark answer {digest % 10000}: the documents address this question."
+
+        if self.seconds_per_token:
+            time.sleep(self.seconds_per_token * len(output.split()))
+        return output
+
+
+# --- Recording Neo4j driver ---
+class FakeResult(list):
+    """Empty query result supporting the parts of the neo4j Result API the code uses."""
+
+    def single(self) -> Optional[Any]:
+        return self[0] if self else None
+
+    def data(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def consume(self) -> None:
+        return None
+
+
+class FakeTransaction:
+    def __init__(self, driver: "FakeNeo4jDriver"):
+        self._driver = driver
+
+    def run(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> FakeResult:
+        self._driver.record(query, {**(parameters or {}), **kwargs})
+        return FakeResult()
+
+
+class FakeSession(FakeTransaction):
+    def __enter__(self) -> "FakeSession":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def execute_write(self, work, *args, **kwargs) -> Any:
+        self._driver.transactions += 1
+        return work(FakeTransaction(self._driver), *args, **kwargs)
+
+    execute_read = execute_write
+
+    def close(self) -> None:
+        return None
+
+
+class FakeNeo4jDriver:
+    """
+    Stand-in for the Neo4j driver that records statements instead of
+    executing them. Counts statements, transactions and UNWIND rows so a
+    benchmark can report how chatty graph writes are.
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.transactions = 0
+        self.rows = 0
+
+    def record(self, query: str, parameters: Dict[str, Any]) -> None:
+        self.statements += 1
+        self.rows += sum(len(value) for value in parameters.values() if isinstance(value, list)) or 1
+
+    def session(self, **kwargs) -> FakeSession:
+        return FakeSession(self)
+
+    def verify_connectivity(self) -> None:
+        return None
+
+    def close(self) -> None:
+        return None
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"statements": self.statements, "transactions": self.transactions, "rows": self.rows}
@@ -0,0 +1,133 @@
+# backend/core/answer_cache.py
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+# --- Pydantic model for loading answer cache settings from a .env file ---
+class AnswerCacheSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
+
+    ANSWER_CACHE_SIMILARITY: float = 0.92
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+    ANSWER_CACHE_MAX_ENTRIES: int = 256
+    ANSWER_CACHE_MAX_PROJECTS: int = 64
+
+answer_cache_settings = AnswerCacheSettings()
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else vector
+
+
+class SemanticAnswerCache:
+    """
+    Per-project cache of chatbot answers looked up by query similarity.
+    A new query reuses a stored answer when the cosine similarity of the
+    query embeddings reaches the threshold. Entries expire after a TTL and
+    each project keeps only its most recently used entries. Entries are
+    tagged with the project's registry revision and dropped once it moves
+    on, so a document change made through another worker process is seen
+    here too.
+    """
+
+    def __init__(self, similarity: float, ttl_seconds: int, max_entries: int, max_projects: int):
+        self.similarity = similarity
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_projects = max_projects
+        self._lock = threading.Lock()
+        self._projects: "OrderedDict[str, OrderedDict[int, Dict[str, Any]]]" = OrderedDict()
+        self._revisions: Dict[str, int] = {}
+        self._next_key = 0
+
+    def _check_revision(self, project_id: str, revision: int) -> None:
+        """Drops a project's entries if they were stored at another revision. Caller holds the lock."""
+        if self._revisions.get(project_id) != revision:
+            self._projects.pop(project_id, None)
+            self._revisions[project_id] = revision
+
+    def lookup(self, project_id: str, revision: int, query_embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """Returns the closest unexpired entry above the similarity threshold, if any."""
+        query = _normalize(query_embedding)
+        now = time.monotonic()
+        with self._lock:
+            self._check_revision(project_id, revision)
+            entries = self._projects.get(project_id)
+            if not entries:
+                return None
+            self._projects.move_to_end(project_id)
+
+            best_key, best_score = None, self.similarity
+            for key, entry in list(entries.items()):
+                if now - entry["created_at"] > self.ttl_seconds:
+                    del entries[key]
+                    continue
+                score = sum(a * b for a, b in zip(query, entry["embedding"]))
+                if score >= best_score:
+                    best_key, best_score = key, score
+
+            if best_key is None:
+                return None
+            entries.move_to_end(best_key)
+            entry = entries[best_key]
+            return {
+                "query": entry["query"],
+                "answer": entry["answer"],
+                "sources": entry["sources"],
+                "similarity": round(best_score, 4),
+            }
+
+    def store(
+        self,
+        project_id: str,
+        revision: int,
+        query: str,
+        query_embedding: List[float],
+        answer: str,
+        sources: List[Dict[str, Any]]
+    ) -> None:
+        with self._lock:
+            self._check_revision(project_id, revision)
+            entries = self._projects.setdefault(project_id, OrderedDict())
+            self._projects.move_to_end(project_id)
+            entries[self._next_key] = {
+                "query": query,
+                "embedding": _normalize(query_embedding),
+                "answer": answer,
+                "sources": sources,
+                "created_at": time.monotonic(),
+            }
+            self._next_key += 1
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            while len(self._projects) > self.max_projects:
+                evicted, _ = self._projects.popitem(last=False)
+                self._revisions.pop(evicted, None)
+
+    def invalidate_project(self, project_id: str) -> None:
+        """Drops every cached answer for a project, e.g. after its documents change."""
+        with self._lock:
+            self._projects.pop(project_id, None)
+            self._revisions.pop(project_id, None)
+        logging.info(f"Invalidated cached chatbot answers for project {project_id}.")
+
+
+# --- Global answer cache ---
+answer_cache = SemanticAnswerCache(
+    similarity=answer_cache_settings.ANSWER_CACHE_SIMILARITY,
+    ttl_seconds=answer_cache_settings.ANSWER_CACHE_TTL_SECONDS,
+    max_entries=answer_cache_settings.ANSWER_CACHE_MAX_ENTRIES,
+    max_projects=answer_cache_settings.ANSWER_CACHE_MAX_PROJECTS
+)
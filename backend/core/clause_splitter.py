@@ -0,0 +1,309 @@
+# backend/core/clause_splitter.py
+
+import bisect
+import re
+import time
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+from . import metrics
+
+
+# --- Pydantic model for loading clause splitter settings from a .env file ---
+class ClauseSplitterSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
+
+    # Clauses longer than this are split at sub-items, then by characters
+    CLAUSE_MAX_CHARS: int = 2000
+    # Shorter segments, such as a bare "1. DEFINITIONS" heading, join the next clause
+    CLAUSE_MIN_CHARS: int = 200
+    # Overlap used only when falling back to character splitting
+    CLAUSE_FALLBACK_OVERLAP: int = 100
+
+clause_splitter_settings = ClauseSplitterSettings()
+
+# Headings at the start of a line, matched in one pass over the document:
+#   "Section 5", "ARTICLE IV", "Clause 2.1"  (keyword)
+#   "1.", "2)", "1.1", "1.1.1."              (number; a bare integer needs "." or ")")
+#   "(a)", "(iv)"                            (item)
+HEADING_PATTERN = re.compile(
+    r"""
+    ^[ \t]*
+    (?:
+        (?:Section|SECTION|Article|ARTICLE|Clause|CLAUSE)[ \t]+(?P<keyword>\d{1,3}(?:\.\d{1,3})*|[IVXLC]{1,6})\b
+      | (?P<number>\d{1,3}(?:\.\d{1,3})+\.?|\d{1,3}[.)])(?=[ \t]+\S)
+      | \((?P<item>[a-z]{1,2}|[ivxl]{1,5})\)(?=[ \t]+\S)
+    )
+    """,
+    re.MULTILINE | re.VERBOSE
+)
+
+ROMAN_ITEM = re.compile(r"[ivxl]+")
+
+# Heading ranks: numbered levels 0, 1, 2... by dot count, then lettered and roman items
+LETTER_RANK = 10
+ROMAN_RANK = 11
+
+
+class Heading(NamedTuple):
+    start: int
+    rank: int
+    label: str
+
+
+class Clause(NamedTuple):
+    text: str
+    section_path: str
+    start: int
+
+
+def find_headings(text: str, previous_item: Optional[Heading] = None) -> List[Heading]:
+    """
+    Finds the headings in `text`. `previous_item` is the last heading
+    before it, if that was an item, for text continuing earlier text.
+    """
+    headings = []
+    for match in HEADING_PATTERN.finditer(text):
+        item = match.group("item")
+        if item:
+            # Items like (i) and (v) are also letters: they count as roman
+            # numerals when they start a list, continue a roman list, or
+            # nest under a letter other than the one before them
+            if not ROMAN_ITEM.fullmatch(item):
+                is_roman = False
+            elif previous_item is None or previous_item.rank == ROMAN_RANK or len(item) > 1:
+                is_roman = True
+            else:
+                is_roman = item == "i" and previous_item.label != "(h)"
+            heading = Heading(match.start(), ROMAN_RANK if is_roman else LETTER_RANK, f"({item})")
+            previous_item = heading
+        else:
+            number = (match.group("keyword") or match.group("number")).rstrip(".)")
+            heading = Heading(match.start(), number.count("."), number)
+            previous_item = None
+        headings.append(heading)
+    return headings
+
+def _section_path(stack: List[Tuple[int, str]], heading: Heading) -> str:
+    """Resolves a heading's full path, e.g. "5 > 5.2 > (a)", updating the stack of open levels."""
+    while stack and stack[-1][0] >= heading.rank:
+        stack.pop()
+    stack.append((heading.rank, heading.label))
+    return " > ".join(label for _, label in stack)
+
+def _char_split(text: str, start: int, section_path: str) -> List[Clause]:
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=clause_splitter_settings.CLAUSE_MAX_CHARS,
+        chunk_overlap=clause_splitter_settings.CLAUSE_FALLBACK_OVERLAP,
+        separators=["\n\n", "\n", ". ", " ", ""]
+    )
+    return [Clause(piece, section_path, start) for piece in splitter.split_text(text)]
+
+def _pack(segments: List[Clause], max_chars: int) -> List[Clause]:
+    """Greedily joins consecutive segments up to max_chars; a longer segment is character-split."""
+    packed: List[Clause] = []
+    for segment in segments:
+        if len(segment.text) > max_chars:
+            packed.extend(_char_split(segment.text, segment.start, segment.section_path))
+        elif packed and len(packed[-1].text) + len(segment.text) + 1 <= max_chars:
+            last = packed[-1]
+            packed[-1] = Clause(f"{last.text}\n{segment.text}", last.section_path, last.start)
+        else:
+            packed.append(segment)
+    return packed
+
+
+class ClauseStream:
+    """
+    Splits a document into one chunk per numbered clause, with lettered
+    sub-items kept inside their clause. A clause over CLAUSE_MAX_CHARS is
+    split at its sub-items, and any piece still too long by characters.
+    Text with no recognizable headings is split by characters alone.
+
+    The text is fed in pieces, such as pages, and only the open clause is
+    held between them: a clause is emitted once the next numbered heading
+    arrives, and a segment growing past twice CLAUSE_MAX_CHARS emits all
+    but its last character-split piece straight away.
+    """
+
+    def __init__(self):
+        self.max_chars = clause_splitter_settings.CLAUSE_MAX_CHARS
+        # Offset of the next text fed, in the document as fed so far
+        self.position = 0
+        self._levels: List[Tuple[int, str]] = []
+        self._previous_item: Optional[Heading] = None
+        self._seen_heading = False
+        # The segment being read: the text since the last heading
+        self._open: List[str] = []
+        self._open_length = 0
+        self._open_start = 0
+        self._open_path = "preamble"
+        # Closed segments of the current clause, and whether part of it was already emitted
+        self._parts: List[Clause] = []
+        self._flushed = False
+        # A short clause waiting to be joined to the next one
+        self._carry: Optional[Clause] = None
+
+    @property
+    def pending_start(self) -> int:
+        """The offset of the earliest text still held, which no emitted clause starts before."""
+        starts = [self._open_start] + [part.start for part in self._parts[:1]]
+        if self._carry:
+            starts.append(self._carry.start)
+        return min(starts)
+
+    def feed(self, text: str) -> List[Clause]:
+        """Adds the next piece of the document and returns the clauses it completed."""
+        clauses: List[Clause] = []
+        offset = self.position
+        headings = find_headings(text, self._previous_item)
+        if headings:
+            self._previous_item = headings[-1] if headings[-1].rank >= LETTER_RANK else None
+
+        previous_end = 0
+        for heading in headings:
+            self._append_open(text[previous_end:heading.start], clauses)
+            previous_end = heading.start
+            self._close_segment()
+            path = _section_path(self._levels, heading)
+            # A numbered heading, or an item with no clause to join, starts a new clause
+            if heading.rank < LETTER_RANK or not (self._parts or self._flushed):
+                clauses.extend(self._close_clause(path))
+            self._seen_heading = True
+            self._open_start = offset + heading.start
+            self._open_path = path
+        self._append_open(text[previous_end:], clauses)
+        self.position = offset + len(text)
+        return clauses
+
+    def close(self) -> List[Clause]:
+        """Returns the clauses still held once the whole document has been fed."""
+        if not self._seen_heading and not self._flushed:
+            text = "".join(self._open)
+            self._open = []
+            return _char_split(text, 0, "") if text.strip() else []
+        self._close_segment()
+        return self._close_clause(None)
+
+    def _append_open(self, text: str, clauses: List[Clause]) -> None:
+        if not text:
+            return
+        self._open.append(text)
+        self._open_length += len(text)
+        if self._open_length > 2 * self.max_chars:
+            clauses.extend(self._flush())
+
+    def _flush(self) -> List[Clause]:
+        """
+        Emits a clause that is already too long: its closed segments packed,
+        then the open segment's character-split pieces but the last, which
+        stays open as later segments may still be packed onto it.
+        """
+        if self._carry:
+            if self._parts:
+                first = self._parts[0]
+                self._parts[0] = Clause(f"{self._carry.text}\n{first.text}", first.section_path, self._carry.start)
+            else:
+                self._open.insert(0, f"{self._carry.text}\n")
+                self._open_start = self._carry.start
+            self._carry = None
+
+        if not self._seen_heading:
+            self._open_path = ""
+        pieces = _char_split("".join(self._open).lstrip(), self._open_start, self._open_path)
+        clauses = _pack(self._parts, self.max_chars) + pieces[:-1]
+        self._parts = []
+        self._flushed = True
+        self._open = [pieces[-1].text] if pieces else []
+        self._open_length = sum(len(piece) for piece in self._open)
+        return clauses
+
+    def _close_segment(self) -> None:
+        """Moves the open segment into the current clause."""
+        text = "".join(self._open).strip()
+        self._open = []
+        self._open_length = 0
+        if text:
+            self._parts.append(Clause(text, self._open_path, self._open_start))
+
+    def _close_clause(self, next_path: Optional[str]) -> List[Clause]:
+        """Emits the current clause, now that the one after it (at `next_path`) is known."""
+        parts, flushed = self._parts, self._flushed
+        self._parts, self._flushed = [], False
+        if not parts:
+            return []
+        if flushed:
+            return _pack(parts, self.max_chars)
+
+        if self._carry:
+            carry, self._carry = self._carry, None
+            parts = [Clause(f"{carry.text}\n{parts[0].text}", parts[0].section_path, carry.start)] + parts[1:]
+        clause = Clause("\n".join(part.text for part in parts), parts[0].section_path, parts[0].start)
+
+        # A short preamble or a bare heading such as "1. DEFINITIONS" joins the
+        # clause nested under it; other short clauses stay chunks of their own
+        leads_into_next = next_path is not None and (
+            parts[0].section_path == "preamble" or next_path.startswith(f"{parts[0].section_path} > ")
+        )
+        if len(clause.text) < clause_splitter_settings.CLAUSE_MIN_CHARS and leads_into_next:
+            self._carry = clause
+            return []
+        if len(clause.text) <= self.max_chars:
+            return [clause]
+        return _pack(parts, self.max_chars)
+
+
+def split_clauses(text: str) -> List[Clause]:
+    """Splits a whole document's text into clauses; see ClauseStream."""
+    stream = ClauseStream()
+    return stream.feed(text) + stream.close()
+
+def split_pages(pages: Iterable[Document]) -> Iterator[Document]:
+    """
+    Splits a document's pages into clause chunks as they are read, so
+    clauses that cross a page break stay whole without the document being
+    held in memory. Pages are joined by a blank line. Each chunk keeps the
+    metadata of the page it starts on, plus `section` (its heading path)
+    and `clause_index` (its position in the document).
+    """
+    stream = ClauseStream()
+    # (offset, metadata) of the pages any held text may still start on
+    page_starts: List[Tuple[int, dict]] = []
+    clause_index = 0
+    elapsed = 0.0
+
+    def to_documents(clauses: List[Clause]) -> List[Document]:
+        nonlocal clause_index
+        documents = []
+        for clause in clauses:
+            page_index = bisect.bisect_right(page_starts, clause.start, key=lambda page: page[0]) - 1
+            metadata = {**page_starts[max(page_index, 0)][1], "section": clause.section_path, "clause_index": clause_index}
+            documents.append(Document(page_content=clause.text, metadata=metadata))
+            clause_index += 1
+        return documents
+
+    for number, page in enumerate(pages):
+        started = time.perf_counter()
+        separator = "\n\n" if number else ""
+        page_starts.append((stream.position + len(separator), page.metadata))
+        clauses = stream.feed(separator + page.page_content)
+        documents = to_documents(clauses)
+        # Forget pages that no held text starts on
+        while len(page_starts) > 1 and page_starts[1][0] <= stream.pending_start:
+            page_starts.pop(0)
+        elapsed += time.perf_counter() - started
+        yield from documents
+
+    if page_starts:
+        started = time.perf_counter()
+        documents = to_documents(stream.close())
+        elapsed += time.perf_counter() - started
+        metrics.observe_stage("split", elapsed)
+        yield from documents
@@ -1,181 +1,586 @@
 # backend/core/features.py
 
+import asyncio
+import base64
+import hashlib
+import json
 import logging
-from typing import Dict, Any, List
-from neo4j import Driver
+import re
+from collections import Counter, defaultdict
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple, Union
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from langchain_core.prompts import PromptTemplate
-from langchain_core.pydantic_v1 import BaseModel, Field
-from ..dependencies import db_connector, llm_connector
-from chromadb import ClientAPI
-from chromadb.utils.embedding_functions import EmbeddingFunction as ChromaEmbeddingFunctionBase
-from langchain_community.embeddings import HuggingFaceEmbeddings
-# Import JsonOutputParser
-from langchain_core.output_parsers import JsonOutputParser
+from ..dependencies import db_connector, llm_connector, structured_output
+from ..dependencies.embedding_service import get_embedding_service
+from . import metrics, near_duplicates, risk_engine
 # Import the schemas from the central location
 from ..api.schemas import SimplifiedClause, RiskAnalysis, ClassificationOutput
 
 
-# --- Feature Implementations ---
+# --- Pydantic model for loading feature settings from a .env file ---
+class FeatureSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
 
-async def simplify_clauses(project_id: str) -> List[Dict[str, Any]]:
-    """Simplifies all clauses in a project and returns a list of results."""
-    logging.info(f"Simplifying clauses for project {project_id}...")
+    # Leading chunks sampled per document for classification, and their max length
+    CLASSIFY_SAMPLE_CHUNKS: int = 3
+    CLASSIFY_MAX_CHARS: int = 1500
+    # Document-to-document edges per /diagram/ page
+    DIAGRAM_PAGE_SIZE: int = 500
+    DIAGRAM_MAX_PAGE_SIZE: int = 5000
 
-    chroma_client: ClientAPI = db_connector.get_chroma_client()
-    if not chroma_client:
-        raise ValueError("ChromaDB client not initialized.")
+feature_settings = FeatureSettings()
 
-    collection_name = f"project_{project_id}"
+
+# --- Prompt Templates ---
+# Cached feature results are keyed by a hash of these, so editing one
+# invalidates the results it produced.
+
+SIMPLIFICATION_TEMPLATE = """You are an expert at rewriting legal text into simple, easy-to-understand language.
+        Rewrite the following legal clause in a way that a non-lawyer can comprehend.
+        Also, extract a list of 5 key terms.
+        Strictly format your response as a JSON object with the keys "simplified_text" and "key_terms".
+        Format Instructions:
+        {format_instructions}
+
+        Legal Clause: {text}
+        """
+
+CLASSIFICATION_LABELS = ['NDA', 'Lease', 'Employment Contract', 'Service Agreement', 'Other']
+
+CLASSIFICATION_TEMPLATE = """You are a legal expert. Read the following excerpt from a legal document and classify the document into one of these categories:
+        ['NDA', 'Lease', 'Employment Contract', 'Service Agreement', 'Other'].
+        Return only a JSON object of the form {{"document_type": "<category name>"}}, with no extra text.
+
+        Document excerpt: {text}
+        """
+
+RISK_TEMPLATE = """You are a legal risk analyst. Assess the clause below for contradictory terms, ambiguous language,
+        or an unusually high level of risk assigned to one party, and check whether it conflicts with the similar clauses
+        from other documents listed after it.
+        Respond with only a JSON object with the keys "risk_level" (one of "None", "Low", "Medium", "High"),
+        "explanation" (one or two sentences) and "conflicts_with" (the numbers of the similar clauses whose terms
+        contradict this clause, or an empty list).
+
+        Screening flagged: {flags}
+        Clause from {document}: {text}
+        Similar clauses from other documents:
+        {related}
+        """
+
+# JSON schemas the LLM output is constrained to, derived from the response
+# models. Fields the server fills in itself, such as the original text and
+# clause IDs, are left out so the model spends no tokens repeating them.
+SIMPLIFICATION_SCHEMA = structured_output.output_schema(
+    SimplifiedClause, ["simplified_text", "key_terms"], {"key_terms": {"maxItems": 5}}
+)
+CLASSIFICATION_SCHEMA = structured_output.output_schema(
+    ClassificationOutput, ["document_type"], {"document_type": {"enum": CLASSIFICATION_LABELS}}
+)
+RISK_SCHEMA = structured_output.output_schema(
+    RiskAnalysis,
+    ["risk_level", "explanation", "conflicts_with"],
+    {
+        "risk_level": {"enum": ["None", *risk_engine.RISK_LEVELS]},
+        "conflicts_with": {
+            "items": {"type": "integer"},
+            "description": "Numbers of the similar clauses whose terms contradict this clause."
+        },
+    }
+)
+
+SIMPLIFICATION_ERROR_TEXT = "Error: Could not simplify this clause."
+RISK_FALLBACK_PREFIX = "Flagged by screening only:"
+
+def get_feature_cache_key(feature_name: str) -> Tuple[str, str]:
+    """
+    Returns the (model_id, prompt_hash) pair that identifies the model and
+    prompt a feature's results were generated with.
+    """
+    if feature_name == "clause_simplification":
+        prompt_text = SIMPLIFICATION_TEMPLATE + json.dumps(SIMPLIFICATION_SCHEMA)
+    elif feature_name == "document_classification":
+        # The sampling bounds change which text gets classified, so they are part of the key
+        prompt_text = CLASSIFICATION_TEMPLATE + json.dumps(CLASSIFICATION_SCHEMA)
+        prompt_text += f"{feature_settings.CLASSIFY_SAMPLE_CHUNKS}:{feature_settings.CLASSIFY_MAX_CHARS}"
+    elif feature_name == "risk_analysis":
+        # The screening rules and thresholds decide which clauses are assessed
+        prompt_text = RISK_TEMPLATE + json.dumps(RISK_SCHEMA)
+        prompt_text += json.dumps(risk_engine.load_risk_rules()) + json.dumps(risk_engine.RISK_PROTOTYPES)
+        prompt_text += risk_engine.risk_settings.model_dump_json()
+    else:
+        raise ValueError(f"Unknown feature: {feature_name}")
+
+    prompt_hash = hashlib.sha256(prompt_text.encode("utf-8")).hexdigest()
+    return llm_connector.llm_settings.LLM_MODEL_ID, prompt_hash
+
+def is_cacheable_result(feature_name: str, result: Any) -> bool:
+    """Returns False for empty results or ones containing per-chunk failures."""
+    if not result:
+        return False
+    if feature_name == "clause_simplification":
+        return all(row.get("simplified_text") != SIMPLIFICATION_ERROR_TEXT for row in result)
+    if feature_name == "risk_analysis":
+        return all(not row.get("explanation", "").startswith(RISK_FALLBACK_PREFIX) for row in result)
+    if feature_name == "document_classification":
+        return not result.get("failed_votes")
+    return True
+
+
+# --- Generation Helpers ---
+
+def prompt_prefix(prompt: PromptTemplate) -> str:
+    """
+    Returns the fixed text a template's prompts all start with: everything
+    before its first input variable, with partial variables filled in.
+    The LLM layer caches the model state for it across prompts.
+    """
+    marker = "\x00"
+    formatted = prompt.format(**{name: marker for name in prompt.input_variables})
+    return formatted.split(marker, 1)[0]
+
+async def iter_generate_concurrently(
+    prompts: List[str],
+    prefix: Optional[str] = None,
+    schema: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[Tuple[int, List[Union[str, Exception]]]]:
+    """
+    Splits prompts into pipeline-sized batches and runs at most
+    LLM_MAX_CONCURRENCY batches at a time off the event loop.
+    Yields (start_index, results) for each batch as soon as it finishes;
+    failed prompts hold their exception. `prefix` is the text shared by
+    every prompt, if any; `schema` is the JSON schema outputs must follow.
+    """
+    batch_size = llm_connector.llm_settings.LLM_BATCH_SIZE
+    semaphore = asyncio.Semaphore(llm_connector.llm_settings.LLM_MAX_CONCURRENCY)
+
+    async def run_batch(start: int, batch: List[str]) -> Tuple[int, List[Union[str, Exception]]]:
+        async with semaphore:
+            try:
+                return start, await asyncio.to_thread(llm_connector.generate_batch, batch, prefix, schema)
+            except Exception as e:
+                return start, [e for _ in batch]
+
+    tasks = [
+        asyncio.create_task(run_batch(start, prompts[start:start + batch_size]))
+        for start in range(0, len(prompts), batch_size)
+    ]
     try:
-        collection = chroma_client.get_collection(name=collection_name)
-    except Exception:
-        raise ValueError(f"Collection for project {project_id} not found.")
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def generate_concurrently(
+    prompts: List[str],
+    prefix: Optional[str] = None,
+    schema: Optional[Dict[str, Any]] = None
+) -> List[Union[str, Exception]]:
+    """Runs prompts through iter_generate_concurrently and returns results in prompt order."""
+    results: List[Union[str, Exception]] = [None] * len(prompts)
+    async for start, batch_results in iter_generate_concurrently(prompts, prefix, schema):
+        results[start:start + len(batch_results)] = batch_results
+    return results
+
 
-    retrieved_chunks = collection.get(include=['metadatas', 'documents'])
+def group_identical_texts(texts: List[str]) -> Dict[str, List[int]]:
+    """
+    Maps each distinct normalized text to the positions holding it, in
+    order, so copies differing only in case or whitespace share one LLM
+    call. Near-duplicates with any wording change are kept apart.
+    """
+    groups: Dict[str, List[int]] = {}
+    for position, text in enumerate(texts):
+        groups.setdefault(near_duplicates.normalize_text(text), []).append(position)
+    return groups
+
+
+# --- Feature Implementations ---
+
+async def iter_simplified_clauses(project_id: str) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Simplifies all clauses in a project, yielding (clause_index, result)
+    pairs as each generation batch finishes. Clauses whose text is
+    identical up to case and whitespace are sent to the LLM once.
+    """
+    logging.info(f"Simplifying clauses for project {project_id}...")
+
+    retrieved_chunks = await db_connector.get_collection_records(
+        f"project_{project_id}", include=['metadatas', 'documents']
+    )
     all_chunks_text = retrieved_chunks['documents']
+    all_metadatas = retrieved_chunks['metadatas']
+    copies = list(group_identical_texts(all_chunks_text).values())
 
     llm = llm_connector.get_llm_for_entity_extraction()
     if not llm:
         raise ValueError("LLM not initialized.")
 
-    simplified_results = []
-
-    parser = JsonOutputParser(pydantic_object=SimplifiedClause)
-
     simplification_prompt = PromptTemplate(
-        template="""You are an expert at rewriting legal text into simple, easy-to-understand language.
-        Rewrite the following legal clause in a way that a non-lawyer can comprehend.
-        Also, extract a list of 5 key terms.
-        Strictly format your response as a JSON object with the following keys:
-        "original_text", "simplified_text", and "key_terms".
-        Format Instructions:
-        {format_instructions}
-
-        Legal Clause: {text}
-        """,
+        template=SIMPLIFICATION_TEMPLATE,
         input_variables=["text"],
-        partial_variables={"format_instructions": parser.get_format_instructions()},
+        partial_variables={"format_instructions": structured_output.format_instructions(SIMPLIFICATION_SCHEMA)},
     )
 
-    try:
-        for chunk_text in all_chunks_text:
-            llm_response = llm.invoke(simplification_prompt.format(text=chunk_text))
+    prompts = [simplification_prompt.format(text=all_chunks_text[positions[0]]) for positions in copies]
 
-            simplified_output = parser.parse(llm_response)
+    # Parse each response on its own so one bad chunk only affects its own row
+    responses = iter_generate_concurrently(prompts, prompt_prefix(simplification_prompt), SIMPLIFICATION_SCHEMA)
+    async for start, llm_responses in responses:
+        for offset, llm_response in enumerate(llm_responses):
+            positions = copies[start + offset]
+            try:
+                if isinstance(llm_response, Exception):
+                    raise llm_response
+                simplified_output = SimplifiedClause.model_validate({
+                    **structured_output.parse_json_object(llm_response),
+                    "original_text": all_chunks_text[positions[0]]
+                }).model_dump()
+            except Exception as e:
+                logging.error(f"Error simplifying a clause: {e}")
+                simplified_output = {
+                    "simplified_text": SIMPLIFICATION_ERROR_TEXT,
+                    "key_terms": []
+                }
+            # Every copy reports its own text and document
+            for position in positions:
+                yield position, {
+                    **simplified_output,
+                    "original_text": all_chunks_text[position],
+                    "source_document": all_metadatas[position].get('source_document')
+                }
+
+async def simplify_clauses(project_id: str) -> List[Dict[str, Any]]:
+    """Simplifies all clauses in a project and returns a list of results."""
+    indexed_results = [item async for item in iter_simplified_clauses(project_id)]
+    indexed_results.sort(key=lambda item: item[0])
+    return [result for _, result in indexed_results]
 
-            if hasattr(simplified_output, "dict"):
-                simplified_results.append(simplified_output.dict())
-            else:
-                simplified_results.append(simplified_output)
 
-    except Exception as e:
-        logging.error(f"Error simplifying a clause in batch: {e}")
-        simplified_results.extend([
-            {
-                "original_text": text,
-                "simplified_text": "Error: Could not simplify this clause.",
-                "key_terms": []
-            }
-            for text in all_chunks_text
-        ])
+def parse_classification_label(llm_response: str) -> Optional[str]:
+    """
+    Returns the category in a model response: its JSON "document_type" if
+    that is a known label, else the label named earliest in the text, or
+    None if it names none.
+    """
+    try:
+        label = structured_output.parse_json_object(llm_response).get("document_type")
+        if label in CLASSIFICATION_LABELS:
+            return label
+    except (ValueError, AttributeError):
+        pass
 
-    return simplified_results
+    matches = []
+    for label in CLASSIFICATION_LABELS:
+        match = re.search(rf"\b{re.escape(label)}\b", llm_response, flags=re.IGNORECASE)
+        if match:
+            matches.append((match.start(), label))
+    return min(matches)[1] if matches else None
 
+def tally_votes(votes: List[str], failed_votes: int = 0) -> Dict[str, Any]:
+    """
+    Picks the majority label; confidence is the share of votes it received.
+    `failed_votes` counts the sampled chunks whose generation failed.
+    """
+    if not votes:
+        return {"document_type": "Other", "confidence_score": 0.0, "votes": {}, "failed_votes": failed_votes}
+    counts = Counter(votes)
+    label, count = counts.most_common(1)[0]
+    return {
+        "document_type": label,
+        "confidence_score": round(count / len(votes), 2),
+        "votes": dict(counts),
+        "failed_votes": failed_votes
+    }
 
 async def classify_document(project_id: str) -> Dict[str, Any]:
-    """Classifies a document's type and returns the result."""
+    """
+    Classifies each document in a project by map-reduce: the leading chunks
+    of every document are classified in parallel (map), then each
+    document's chunk votes are combined into its label (reduce). The
+    top-level label pools all votes in the project.
+    """
     logging.info(f"Classifying documents for project {project_id}...")
-    
-    chroma_client: ClientAPI = db_connector.get_chroma_client()
-    if not chroma_client:
-        raise ValueError("ChromaDB client not initialized.")
-    
+
+    # Pick a bounded sample of leading chunks per document, reading metadata only
     collection_name = f"project_{project_id}"
-    try:
-        collection = chroma_client.get_collection(name=collection_name)
-    except Exception as e:
-        raise ValueError(f"Collection for project {project_id} not found.")
+    stored = await db_connector.get_collection_records(collection_name, include=['metadatas'])
+    chunks_by_document: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+    for chunk_id, metadata in zip(stored['ids'], stored['metadatas']):
+        # Chunks stored before clause splitting have no clause_index; order those by page
+        position = metadata.get('clause_index', metadata.get('page', 0))
+        chunks_by_document[metadata['source_document']].append((position, chunk_id))
+
+    sample_size = feature_settings.CLASSIFY_SAMPLE_CHUNKS
+    sampled_ids = {
+        name: [chunk_id for _, chunk_id in sorted(chunks)[:sample_size]]
+        for name, chunks in chunks_by_document.items()
+    }
+    all_sampled_ids = [chunk_id for ids in sampled_ids.values() for chunk_id in ids]
+    if not all_sampled_ids:
+        return {**tally_votes([]), "documents": []}
+
+    sampled = await db_connector.get_collection_records(collection_name, ids=all_sampled_ids, include=['documents'])
+    text_by_id = dict(zip(sampled['ids'], sampled['documents']))
 
-    # Retrieve all document chunks and join them into a single string
-    retrieved_chunks = collection.get(include=['metadatas', 'documents'])
-    all_chunks_text = retrieved_chunks['documents']
-    document_text = " ".join(all_chunks_text)
-    
     llm = llm_connector.get_llm_for_entity_extraction()
     if not llm:
         raise ValueError("LLM not initialized.")
 
     classification_prompt = PromptTemplate(
-        template="""You are a legal expert. Read the following document and classify it into one of these categories:
-        ['NDA', 'Lease', 'Employment Contract', 'Service Agreement', 'Other'].
-        Return only the category name as a string, with no extra text or punctuation.
-
-        Document text: {text}
-        """,
+        template=CLASSIFICATION_TEMPLATE,
         input_variables=["text"]
     )
-    
-    classification_result = llm.invoke(classification_prompt.format(text=document_text))
-    
-    # You would need to parse this string output and assign a confidence score
-    return {"document_type": classification_result, "confidence_score": 0.95}
 
+    # Map: one vote per sampled chunk, truncated to stay well inside the context window.
+    # Identical sampled text, such as a shared cover page, is classified once.
+    max_chars = feature_settings.CLASSIFY_MAX_CHARS
+    copies = list(group_identical_texts([text_by_id[chunk_id][:max_chars] for chunk_id in all_sampled_ids]).values())
+    prompts = [
+        classification_prompt.format(text=text_by_id[all_sampled_ids[positions[0]]][:max_chars])
+        for positions in copies
+    ]
+    llm_responses = await generate_concurrently(prompts, prompt_prefix(classification_prompt), CLASSIFICATION_SCHEMA)
+    label_by_id = {}
+    failed_ids = set()
+    for positions, llm_response in zip(copies, llm_responses):
+        if isinstance(llm_response, Exception):
+            logging.error(f"Error classifying chunk {all_sampled_ids[positions[0]]}: {llm_response}")
+            failed_ids.update(all_sampled_ids[position] for position in positions)
+            continue
+        label = parse_classification_label(llm_response)
+        for position in positions:
+            label_by_id[all_sampled_ids[position]] = label
+
+    # Reduce: combine chunk votes per document, then across the project.
+    # Failed generations are counted, so a result missing them is never cached.
+    document_results = []
+    all_votes = []
+    for name, ids in sampled_ids.items():
+        votes = [label_by_id[chunk_id] for chunk_id in ids if label_by_id.get(chunk_id)]
+        all_votes.extend(votes)
+        failed_votes = sum(1 for chunk_id in ids if chunk_id in failed_ids)
+        document_results.append({"document_name": name, **tally_votes(votes, failed_votes)})
+
+    return {**tally_votes(all_votes, len(failed_ids)), "documents": document_results}
 
-async def get_relationship_diagram(project_id: str) -> Dict[str, Any]:
+
+def encode_diagram_cursor(edge: Dict[str, str]) -> str:
+    """Encodes the last edge of a page as an opaque cursor for the next page."""
+    key = json.dumps([edge["source"], edge["target"], edge["type"]])
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii")
+
+def decode_diagram_cursor(cursor: str) -> List[str]:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid diagram cursor.")
+    if not (isinstance(key, list) and len(key) == 3 and all(isinstance(part, str) for part in key)):
+        raise ValueError("Invalid diagram cursor.")
+    return key
+
+# Every node of the project subgraph: the project and its documents
+DIAGRAM_NODES_QUERY = """
+MATCH (p:Project {id: $pid})
+OPTIONAL MATCH (p)-[:CONTAINS_DOCUMENT]->(d:Document)
+RETURN p.id AS project, collect(DISTINCT d.name) AS documents
+"""
+
+# One page of document-to-document edges, in keyset order after the cursor
+DIAGRAM_EDGES_QUERY = """
+MATCH (s:Document {project_id: $pid})-[r:REL]->(t:Document {project_id: $pid})
+WITH s.name AS source, t.name AS target, r.type AS type
+WHERE $after IS NULL
+   OR source > $after[0]
+   OR (source = $after[0] AND (target > $after[1] OR (target = $after[1] AND type > $after[2])))
+RETURN source, target, type
+ORDER BY source, target, type
+LIMIT $limit
+"""
+
+async def get_relationship_diagram(project_id: str, cursor: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
     """
-    Queries the Neo4j knowledge graph and returns a structured representation
-    for the frontend to visualize.
+    Returns one page of a project's knowledge graph as compact records.
+    The first page carries every node (the project and its documents) with
+    their containment edges; each page carries up to `limit` document-to-
+    document edges, and `next_cursor` is set while more remain.
     """
     logging.info(f"Generating relationship diagram for project {project_id}...")
-    neo4j_driver = db_connector.get_neo4j_driver()
+    neo4j_driver = db_connector.get_neo4j_async_driver()
     if not neo4j_driver:
         raise ConnectionError("Neo4j driver is not connected.")
-    
-    # Cypher query to get all nodes and relationships for a project
-    cypher_query = f"""
-    MATCH (p:Project {{id: '{project_id}'}})-[r]-(n)
-    RETURN p, r, n
-    """
-    
-    nodes, relationships = [], []
-    with neo4j_driver.session() as session:
-        result = session.run(cypher_query)
-        # You'll process the result to build a JSON object the frontend can use
-        # This is a conceptual loop
-        for record in result:
-            nodes.append(record['n'])
-            relationships.append(record['r'])
 
-    return {"nodes": nodes, "relationships": relationships}
+    after = decode_diagram_cursor(cursor) if cursor else None
+    page_size = min(limit or feature_settings.DIAGRAM_PAGE_SIZE, feature_settings.DIAGRAM_MAX_PAGE_SIZE)
 
+    nodes, edges = [], []
+    with metrics.timed("neo4j_read"):
+        async with neo4j_driver.session() as session:
+            if after is None:
+                result = await session.run(DIAGRAM_NODES_QUERY, pid=project_id)
+                record = await result.single()
+                if record:
+                    nodes.append({"id": project_id, "label": "Project", "type": "Project"})
+                    for name in sorted(record["documents"]):
+                        nodes.append({"id": name, "label": name, "type": "Document"})
+                        edges.append({"source": project_id, "target": name, "type": "CONTAINS_DOCUMENT"})
+
+            # Fetch one extra edge to learn whether another page follows
+            result = await session.run(DIAGRAM_EDGES_QUERY, pid=project_id, after=after, limit=page_size + 1)
+            rel_edges = [
+                {"source": rec["source"], "target": rec["target"], "type": rec["type"]}
+                async for rec in result
+            ]
+
+    has_more = len(rel_edges) > page_size
+    rel_edges = rel_edges[:page_size]
+    return {
+        "project_id": project_id,
+        "nodes": nodes,
+        "edges": edges + rel_edges,
+        "next_cursor": encode_diagram_cursor(rel_edges[-1]) if has_more else None,
+    }
+
+
+async def find_cross_document_neighbours(
+    collection_name: str,
+    vectors: Dict[str, List[float]],
+    documents_by_id: Dict[str, str]
+) -> Dict[str, List[Tuple[str, float]]]:
+    """
+    Looks up each clause's nearest clauses in other documents through the
+    collection's vector index, then scores each pair by exact cosine
+    similarity of the normalized embeddings.
+    """
+    ids_by_document: Dict[str, List[str]] = defaultdict(list)
+    for clause_id, document in documents_by_id.items():
+        ids_by_document[document].append(clause_id)
+    if len(ids_by_document) < 2:
+        return {}
+
+    neighbours: Dict[str, List[Tuple[str, float]]] = {}
+    batch_size = risk_engine.risk_settings.RISK_QUERY_BATCH_SIZE
+    for document, clause_ids in ids_by_document.items():
+        for start in range(0, len(clause_ids), batch_size):
+            batch = clause_ids[start:start + batch_size]
+            hits = await db_connector.query_collection(
+                collection_name,
+                query_embeddings=[vectors[clause_id] for clause_id in batch],
+                n_results=risk_engine.risk_settings.RISK_NEIGHBOURS,
+                where={"source_document": {"$ne": document}},
+                include=["distances"]
+            )
+            for clause_id, other_ids in zip(batch, hits["ids"]):
+                neighbours[clause_id] = [
+                    (other_id, risk_engine.dot(vectors[clause_id], vectors[other_id]))
+                    for other_id in other_ids if other_id in vectors
+                ]
+    return neighbours
 
 async def analyze_risks(project_id: str) -> List[Dict[str, Any]]:
-    """Analyzes a project's documents for potential risks."""
+    """
+    Clause-level risk analysis. Every chunk is screened with the keyword
+    rules and the risk prototype embeddings, and clauses of different
+    documents that are nearest neighbours are paired as possible conflicts.
+    Only the screened-in candidates reach the LLM, so cost follows the
+    number of candidates rather than the size of the corpus. Candidates
+    with identical text and identical conflict partners share one LLM call.
+    """
     logging.info(f"Running risk analysis for project {project_id}...")
-    
-    rag_chain = llm_connector.get_rag_chain()
-    if not rag_chain:
-        raise ValueError("RAG chain not initialized.")
+
+    collection_name = f"project_{project_id}"
+    stored = await db_connector.get_collection_records(
+        collection_name, include=['documents', 'metadatas', 'embeddings']
+    )
+    clause_ids = stored['ids']
+    if not clause_ids:
+        return []
+    texts = dict(zip(clause_ids, stored['documents']))
+    documents_by_id = {
+        clause_id: metadata['source_document'] for clause_id, metadata in zip(clause_ids, stored['metadatas'])
+    }
+    vectors = {
+        clause_id: risk_engine.normalize(embedding) for clause_id, embedding in zip(clause_ids, stored['embeddings'])
+    }
+
+    # 1. Screen every clause with the cheap heuristics
+    embeddings = await asyncio.to_thread(get_embedding_service)
+    prototype_embeddings = await asyncio.to_thread(embeddings.embed_documents, risk_engine.RISK_PROTOTYPES)
+    prototypes = [risk_engine.normalize(embedding) for embedding in prototype_embeddings]
+    screens = await asyncio.to_thread(lambda: {
+        clause_id: risk_engine.screen_clause(texts[clause_id], vectors[clause_id], prototypes)
+        for clause_id in clause_ids
+    })
+
+    # 2. Pair similar clauses across documents
+    neighbours = await find_cross_document_neighbours(collection_name, vectors, documents_by_id)
+    conflicts = risk_engine.pair_conflicts(documents_by_id, neighbours, texts)
+
+    # 3. Ask the LLM about the candidates only
+    candidates = risk_engine.select_candidates(screens, conflicts)
+    logging.info(f"Risk screening kept {len(candidates)} of {len(clause_ids)} clauses for project {project_id}.")
+
+    max_chars = risk_engine.risk_settings.RISK_MAX_CLAUSE_CHARS
+    risk_prompt = PromptTemplate(
+        template=RISK_TEMPLATE,
+        input_variables=["flags", "document", "text", "related"]
+    )
+    conflict_ids_by_clause = {
+        clause_id: conflicts.get(clause_id, [])[:risk_engine.risk_settings.RISK_NEIGHBOURS]
+        for clause_id in candidates
+    }
+    # Candidates whose prompt would differ only in the document name share a call
+    copies: Dict[Tuple[str, ...], List[str]] = {}
+    for clause_id in candidates:
+        prompt_texts = [texts[clause_id]] + [texts[other_id] for other_id in conflict_ids_by_clause[clause_id]]
+        key = (", ".join(screens[clause_id]["categories"]), *(
+            near_duplicates.normalize_text(text[:max_chars]) for text in prompt_texts
+        ))
+        copies.setdefault(key, []).append(clause_id)
+    prompts = []
+    for clause_id in (group[0] for group in copies.values()):
+        related = [
+            f"{number}. From {documents_by_id[other_id]}: {texts[other_id][:max_chars]}"
+            for number, other_id in enumerate(conflict_ids_by_clause[clause_id], start=1)
+        ]
+        prompts.append(risk_prompt.format(
+            flags=", ".join(screens[clause_id]["categories"]) or "nothing",
+            document=documents_by_id[clause_id],
+            text=texts[clause_id][:max_chars],
+            related="\n        ".join(related) or "None"
+        ))
+    llm_responses = await generate_concurrently(prompts, prompt_prefix(risk_prompt), RISK_SCHEMA)
 
     risk_results = []
-    
-    # 1. We'll need to retrieve all chunks for the project
-    # This is a conceptual query, you'll need to refine it.
-    
-    risk_query = """
-    Analyze the provided documents for any clauses that contain contradictory
-    terms, ambiguous language, or assign an unusually high level of risk to one party.
-    Identify any clauses that conflict with other clauses in the same or different documents.
-    For each identified issue, provide an explanation.
-    """
-    
-    # Corrected line: remove the await keyword
-    risk_output = rag_chain.invoke({"query": risk_query, "project_id": project_id})
-    
-    # The response from the RAG chain is a dictionary
-    answer = risk_output.get('result', "Could not find an answer.")
-    
-    # You will need to parse this output into a structured format
-    risk_results.append({"risk_level": "High", "explanation": answer})
-    
-    return risk_results
\ No newline at end of file
+    for group, llm_response in zip(copies.values(), llm_responses):
+        # Conflict numbers resolve to each copy's own partners
+        for clause_id in group:
+            conflict_ids = conflict_ids_by_clause[clause_id]
+            try:
+                if isinstance(llm_response, Exception):
+                    raise llm_response
+                assessment = risk_engine.parse_risk_response(llm_response, conflict_ids)
+            except Exception as e:
+                # Fall back to the screening verdict so one bad generation does not lose the clause
+                logging.error(f"Error assessing clause {clause_id}: {e}")
+                screen = screens[clause_id]
+                flagged = ", ".join(screen["keywords"]) or "similarity to known risky clauses"
+                assessment = {
+                    "risk_level": risk_engine.heuristic_risk_level(screen, len(conflict_ids)),
+                    "explanation": f"{RISK_FALLBACK_PREFIX} {flagged}.",
+                    "conflicts_with": conflict_ids,
+                }
+            if assessment is None:
+                continue
+            risk_results.append(RiskAnalysis(
+                clause_id=clause_id,
+                source_document=documents_by_id[clause_id],
+                **assessment
+            ).model_dump())
+
+    risk_results.sort(key=lambda row: -risk_engine.RISK_LEVELS.index(row["risk_level"]))
+    return risk_results
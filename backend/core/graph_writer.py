@@ -0,0 +1,74 @@
+# backend/core/graph_writer.py
+
+import logging
+from typing import List, Set, Tuple
+
+from neo4j import Driver, ManagedTransaction
+
+from . import metrics
+
+
+class GraphWriter:
+    """
+    Collects a project's document nodes and relationships in memory and
+    writes them with batched UNWIND queries inside one managed write
+    transaction, instead of one session and query per edge.
+    """
+
+    def __init__(self, project_id: str, batch_size: int = 500):
+        self.project_id = project_id
+        self.batch_size = batch_size
+        self._documents: Set[str] = set()
+        self._relationships: Set[Tuple[str, str, str]] = set()
+
+    def add_document(self, name: str) -> None:
+        self._documents.add(name)
+
+    def add_relationship(self, source: str, target: str, rel_type: str) -> None:
+        self._relationships.add((source, target, rel_type))
+
+    def _batches(self, rows: List[dict]) -> List[List[dict]]:
+        return [rows[i:i + self.batch_size] for i in range(0, len(rows), self.batch_size)]
+
+    def _write(self, tx: ManagedTransaction) -> None:
+        tx.run("MERGE (p:Project {id: $pid})", pid=self.project_id)
+
+        documents = [{"name": name} for name in sorted(self._documents)]
+        for batch in self._batches(documents):
+            tx.run(
+                """
+                MATCH (p:Project {id: $pid})
+                UNWIND $rows AS row
+                MERGE (d:Document {project_id: $pid, name: row.name})
+                MERGE (p)-[:CONTAINS_DOCUMENT]->(d)
+                """,
+                pid=self.project_id,
+                rows=batch
+            )
+
+        relationships = [
+            {"source": source, "target": target, "type": rel_type}
+            for source, target, rel_type in sorted(self._relationships)
+        ]
+        for batch in self._batches(relationships):
+            tx.run(
+                """
+                UNWIND $rows AS row
+                MATCH (s:Document {project_id: $pid, name: row.source})
+                MATCH (t:Document {project_id: $pid, name: row.target})
+                MERGE (s)-[:REL {type: row.type}]->(t)
+                """,
+                pid=self.project_id,
+                rows=batch
+            )
+
+    def flush(self, driver: Driver) -> None:
+        """Writes everything collected so far in a single transaction and clears the buffers."""
+        with metrics.timed("neo4j_write"), driver.session() as session:
+            session.execute_write(self._write)
+        logging.info(
+            f"Wrote {len(self._documents)} documents and {len(self._relationships)} relationships "
+            f"for project {self.project_id}."
+        )
+        self._documents.clear()
+        self._relationships.clear()
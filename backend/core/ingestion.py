@@ -1,34 +1,46 @@
 # backend/core/ingestion.py
 
 import uuid
+import hashlib
 import os
 import shutil
 import logging
 import json
-import re # <-- Import the regex library
-import torch
-from typing import List, Tuple, Dict, Any
+from functools import lru_cache
+from typing import Callable, List, Set, Tuple, Dict, Any
 
 from fastapi import UploadFile
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyMuPDFLoader, Docx2txtLoader, TextLoader
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.document_loaders.pdf import PyPDFLoader
 from langchain_core.documents import Document
-from langchain_groq import ChatGroq
-from langchain.prompts import PromptTemplate
 from pydantic import BaseModel, Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from chromadb.api import ClientAPI
-from chromadb.utils.embedding_functions import EmbeddingFunction as ChromaEmbeddingFunctionBase
 
-from ..dependencies import db_connector
-from ..dependencies import llm_connector
+from ..dependencies import db_connector, llm_connector
+from .graph_writer import GraphWriter
+from .pattern_matcher import PatternMatcher
+from .loaders import iter_document_pages
+from .clause_splitter import split_pages
+from . import lexical_index, metrics, near_duplicates, result_cache
+from .answer_cache import answer_cache
 from ..dependencies.llm_connector import ChromaEmbeddingFunction
 
 
 # --- Configuration and Helpers ---
+class IngestionSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
+
+    RELATIONSHIP_RULES_PATH: str = os.path.join(os.path.dirname(__file__), "relationship_rules.json")
+
+ingestion_settings = IngestionSettings()
+
 UPLOAD_DIR = "./data/uploaded_documents"
+# Subdirectory of a project holding files uploaded to it until they are ingested
+STAGING_DIR = ".staging"
 if not os.path.exists(UPLOAD_DIR):
     os.makedirs(UPLOAD_DIR)
 
@@ -36,19 +48,6 @@ def create_project_id() -> str:
     """Generates a unique project ID using UUID4."""
     return str(uuid.uuid4())
 
-def get_document_loader(file_path: str):
-    """Returns the correct LangChain document loader for a file."""
-    file_extension = file_path.split('.')[-1].lower()
-    if file_extension == 'pdf':
-        return PyPDFLoader(file_path)
-    elif file_extension == 'docx':
-        return Docx2txtLoader(file_path)
-    # Add more loaders for other file types here
-    elif file_extension in ['txt', 'eml']:
-        return TextLoader(file_path)
-    else:
-        raise ValueError(f"Unsupported file type: {file_extension}")
-
 # --- Pydantic Schema for Knowledge Graph Output ---
 class Entity(BaseModel):
     name: str = Field(..., description="The name of the entity.")
@@ -67,143 +66,411 @@ class KnowledgeGraphList(BaseModel):
     graphs: List[KnowledgeGraph] = Field(default_factory=list)
 
 # --- Main Ingestion Pipeline ---
-async def process_project(files: List[UploadFile]) -> Tuple[str, List[str]]:
+def save_project_files(files: List[UploadFile], project_id: str = None) -> Tuple[str, List[str]]:
     """
-    Ingests and processes multiple documents for a new project.
+    Saves uploaded files under a project directory and returns the project
+    ID with the saved file paths. A new project is created unless an
+    existing project_id is given, in which case the files are staged in a
+    directory of their own and only moved into place once add_project_documents
+    succeeds, so a failed upload never touches the project's current files.
+    Processing happens separately.
     """
-    project_id = create_project_id()
-    project_path = os.path.join(UPLOAD_DIR, project_id)
-    os.makedirs(project_path)
-    
+    is_new_project = project_id is None
+    if is_new_project:
+        project_id = create_project_id()
+        project_path = os.path.join(UPLOAD_DIR, project_id)
+    else:
+        project_path = os.path.join(UPLOAD_DIR, project_id, STAGING_DIR, uuid.uuid4().hex)
+    os.makedirs(project_path, exist_ok=False)
+
     saved_paths = []
     try:
-        # Save uploaded files to a temporary directory
         for file in files:
-            file_path = os.path.join(project_path, file.filename)
+            file_path = os.path.join(project_path, os.path.basename(file.filename))
             with open(file_path, "wb") as buffer:
                 shutil.copyfileobj(file.file, buffer)
             saved_paths.append(file_path)
+    except Exception as e:
+        logging.error(f"Error saving files for project {project_id}: {e}")
+        shutil.rmtree(project_path, ignore_errors=True)
+        raise e
 
-        logging.info(f"Saved {len(files)} documents for project {project_id}")
-
-        # Load, split, and embed documents
-        all_chunks = []
-        for path in saved_paths:
-            loader = get_document_loader(path)
-            documents = loader.load()
-            
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=2000,
-                chunk_overlap=200,
-                separators=["\n\n", "\n", ". ", " ", ""]
-            )
-            chunks = text_splitter.split_documents(documents)
-            
-            for chunk in chunks:
-                chunk.metadata['project_id'] = project_id
-                chunk.metadata['source_document'] = os.path.basename(path)
-            
-            all_chunks.extend(chunks)
+    logging.info(f"Saved {len(files)} documents for project {project_id}")
+    return project_id, saved_paths
 
-        # Populate the databases
-        await populate_vector_db(project_id, all_chunks)
-        await populate_knowledge_graph(project_id, all_chunks)
+def discard_staged_files(saved_paths: List[str]) -> None:
+    """Removes the staging directory of files saved for an existing project."""
+    if saved_paths:
+        shutil.rmtree(os.path.dirname(saved_paths[0]), ignore_errors=True)
 
-        return project_id, [os.path.basename(path) for path in saved_paths]
+def commit_staged_files(project_id: str, saved_paths: List[str]) -> None:
+    """Moves staged files into the project directory, replacing files of the same name."""
+    project_path = os.path.join(UPLOAD_DIR, project_id)
+    for path in saved_paths:
+        os.replace(path, os.path.join(project_path, os.path.basename(path)))
+    discard_staged_files(saved_paths)
+
+def delete_project_files(project_id: str) -> None:
+    """Removes a project's uploaded files from disk."""
+    project_path = os.path.join(UPLOAD_DIR, project_id)
+    if os.path.exists(project_path):
+        shutil.rmtree(project_path)
+
+def _no_progress(stage: str, progress: float) -> None:
+    pass
+
+def make_chunk_id(project_id: str, source_document: str, text: str) -> str:
+    """Content-addressed chunk ID: stable across re-ingestion of the same text."""
+    digest = hashlib.sha256(f"{source_document}\x00{text}".encode("utf-8")).hexdigest()
+    return f"{project_id}_{digest}"
+
+def load_and_split(
+    project_id: str,
+    saved_paths: List[str],
+    progress: Callable[[str, float], None] = _no_progress
+) -> List[Document]:
+    """
+    Loads saved documents and splits each into clause-aligned, tagged
+    chunks. Pages are split as they are read, so only the clause open at a
+    page break is held rather than the whole document's text.
+    """
+    all_chunks = []
+    for index, path in enumerate(saved_paths):
+        progress("loading", 40.0 * index / len(saved_paths))
+        source_document = os.path.basename(path)
+        for chunk in split_pages(iter_document_pages(path)):
+            chunk.metadata['project_id'] = project_id
+            chunk.metadata['source_document'] = source_document
+            chunk.metadata['chunk_id'] = make_chunk_id(project_id, source_document, chunk.page_content)
+            all_chunks.append(chunk)
+    return all_chunks
+
+def count_chunks(chunks: List[Document]) -> Dict[str, int]:
+    """Counts distinct chunks per source document."""
+    chunk_ids: Dict[str, Set[str]] = {}
+    for chunk in chunks:
+        chunk_ids.setdefault(chunk.metadata['source_document'], set()).add(chunk.metadata['chunk_id'])
+    return {name: len(ids) for name, ids in chunk_ids.items()}
+
+def process_project(
+    project_id: str,
+    saved_paths: List[str],
+    progress: Callable[[str, float], None] = _no_progress
+) -> Dict[str, int]:
+    """
+    Loads, splits and embeds a project's saved documents and builds its
+    knowledge graph. Runs synchronously, so call it from a worker thread.
+    `progress(stage, percent)` is called as each stage advances.
+    Near-identical chunks, such as boilerplate repeated across documents,
+    are embedded once and share that embedding; each keeps its own text.
+    Returns the number of chunks stored per document.
+    """
+    try:
+        # Load and split documents page by page (0-40%)
+        all_chunks = load_and_split(project_id, saved_paths, progress)
+        with metrics.timed("near_duplicates"):
+            near_duplicates.mark_near_duplicates(all_chunks)
+
+        # Populate the databases (40-100%)
+        progress("embedding", 40.0)
+        populate_vector_db(project_id, all_chunks)
+        lexical_index.index_chunks(project_id, all_chunks)
+        progress("graph", 80.0)
+        populate_knowledge_graph(project_id, all_chunks)
+
+        return {os.path.basename(path): 0 for path in saved_paths} | count_chunks(all_chunks)
 
     except Exception as e:
         logging.error(f"Error processing project {project_id}: {e}")
-        if os.path.exists(project_path):
-            shutil.rmtree(project_path)
+        delete_project_files(project_id)
+        lexical_index.delete_project_index(project_id)
+        llm_connector.evict_project(project_id)
         raise e
 
-async def populate_vector_db(project_id: str, chunks: List[Document]) -> None:
-    """Populates the ChromaDB vector store with document chunks."""
+def add_project_documents(
+    project_id: str,
+    saved_paths: List[str],
+    progress: Callable[[str, float], None] = _no_progress
+) -> Dict[str, int]:
+    """
+    Adds documents to an existing project. Only the new files are split and
+    embedded; graph edges are computed between the new documents and the
+    rest of the project. A file whose name already exists replaces it.
+    New chunks near-identical to a stored chunk reuse its embedding.
+    Returns the number of chunks stored per new document.
+    """
+    new_names = [os.path.basename(path) for path in saved_paths]
+    previous_chunks: List[Document] = []
+    new_chunks: List[Document] = []
+    graph_replaced = False
     try:
-        chroma_client: ClientAPI = db_connector.get_chroma_client()
-        if not chroma_client:
-            raise ConnectionError("ChromaDB client is not connected.")
-        
-        embeddings = ChromaEmbeddingFunction()
-        
-        collection_name = f"project_{project_id}"
-        collection = chroma_client.get_or_create_collection(name=collection_name, embedding_function=embeddings)
-        
-        collection.add(
-            documents=[chunk.page_content for chunk in chunks],
-            metadatas=[chunk.metadata for chunk in chunks],
-            ids=[f"{project_id}_{i}" for i in range(len(chunks))]
+        new_chunks = load_and_split(project_id, saved_paths, progress)
+        stored_chunks = get_project_chunks(project_id)
+        existing_chunks = [chunk for chunk in stored_chunks if chunk.metadata['source_document'] not in new_names]
+        previous_chunks = [chunk for chunk in stored_chunks if chunk.metadata['source_document'] in new_names]
+        with metrics.timed("near_duplicates"):
+            near_duplicates.mark_near_duplicates(new_chunks, existing_chunks)
+
+        # The previous version of a re-uploaded document stays in place
+        # until the new one is fully stored, so a failure loses nothing
+        progress("embedding", 40.0)
+        populate_vector_db(project_id, new_chunks)
+
+        progress("graph", 80.0)
+        graph_replaced = True
+        for name in new_names:
+            remove_document_from_graph(project_id, name)
+        update_knowledge_graph(project_id, new_chunks, existing_chunks)
+
+        new_ids = {chunk.metadata['chunk_id'] for chunk in new_chunks}
+        delete_chunks(project_id, [
+            chunk.metadata['chunk_id'] for chunk in previous_chunks if chunk.metadata['chunk_id'] not in new_ids
+        ])
+        for name in new_names:
+            lexical_index.remove_document(project_id, name)
+        lexical_index.index_chunks(project_id, new_chunks)
+        commit_staged_files(project_id, saved_paths)
+
+        result_cache.get_result_cache().invalidate_project(project_id)
+        answer_cache.invalidate_project(project_id)
+        llm_connector.evict_project(project_id)
+        return {name: 0 for name in new_names} | count_chunks(new_chunks)
+
+    except Exception as e:
+        logging.error(f"Error adding documents to project {project_id}: {e}")
+        try:
+            restore_previous_documents(project_id, new_names, new_chunks, previous_chunks, graph_replaced)
+        except Exception as rollback_error:
+            logging.error(f"Failed to restore the previous documents of project {project_id}: {rollback_error}")
+        discard_staged_files(saved_paths)
+        llm_connector.evict_project(project_id)
+        raise e
+
+def restore_previous_documents(
+    project_id: str,
+    new_names: List[str],
+    new_chunks: List[Document],
+    previous_chunks: List[Document],
+    graph_replaced: bool
+) -> None:
+    """
+    Undoes a failed add_project_documents: drops the chunks only the new
+    versions had and, if the graph was already rewritten, rebuilds the
+    previous versions' nodes and edges from their stored chunks.
+    """
+    previous_ids = {chunk.metadata['chunk_id'] for chunk in previous_chunks}
+    delete_chunks(project_id, list({
+        chunk.metadata['chunk_id'] for chunk in new_chunks if chunk.metadata['chunk_id'] not in previous_ids
+    }))
+    if graph_replaced:
+        for name in new_names:
+            remove_document_from_graph(project_id, name)
+        if previous_chunks:
+            previous_names = {chunk.metadata['source_document'] for chunk in previous_chunks}
+            update_knowledge_graph(
+                project_id, previous_chunks,
+                [chunk for chunk in get_project_chunks(project_id) if chunk.metadata['source_document'] not in previous_names]
+            )
+
+def remove_project_document(project_id: str, document_name: str) -> None:
+    """Removes one document's file, chunks and graph node from a project."""
+    remove_document_chunks(project_id, document_name)
+    remove_document_from_graph(project_id, document_name)
+
+    file_path = os.path.join(UPLOAD_DIR, project_id, os.path.basename(document_name))
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+    result_cache.get_result_cache().invalidate_project(project_id)
+    answer_cache.invalidate_project(project_id)
+    llm_connector.evict_project(project_id)
+    logging.info(f"Removed document '{document_name}' from project {project_id}.")
+
+def get_project_collection(project_id: str):
+    """Opens the project's ChromaDB collection."""
+    chroma_client: ClientAPI = db_connector.get_chroma_client()
+    if not chroma_client:
+        raise ConnectionError("ChromaDB client is not connected.")
+
+    return chroma_client.get_or_create_collection(
+        name=f"project_{project_id}", embedding_function=ChromaEmbeddingFunction()
+    )
+
+def get_project_chunks(project_id: str, exclude_documents: List[str] = None) -> List[Document]:
+    """Reads a project's stored chunks back from ChromaDB."""
+    collection = get_project_collection(project_id)
+    where = {"source_document": {"$nin": exclude_documents}} if exclude_documents else None
+    with metrics.timed("chroma_get"):
+        stored = db_connector.with_chroma_retries(
+            lambda: collection.get(where=where, include=['documents', 'metadatas'])
         )
-        
+    return [
+        Document(page_content=text, metadata=metadata)
+        for text, metadata in zip(stored['documents'], stored['metadatas'])
+    ]
+
+def delete_chunks(project_id: str, chunk_ids: List[str]) -> None:
+    """Deletes chunks from the project's collection by ID."""
+    if not chunk_ids:
+        return
+    collection = get_project_collection(project_id)
+    db_connector.with_chroma_retries(lambda: collection.delete(ids=chunk_ids))
+
+def remove_document_chunks(project_id: str, document_name: str) -> None:
+    """Deletes all of one document's chunks from the project's collection."""
+    collection = get_project_collection(project_id)
+    db_connector.with_chroma_retries(lambda: collection.delete(where={"source_document": document_name}))
+    lexical_index.remove_document(project_id, document_name)
+
+def populate_vector_db(project_id: str, chunks: List[Document]) -> None:
+    """
+    Populates the ChromaDB vector store with document chunks. A chunk
+    marked with `canonical_id` is stored with its own text but reuses the
+    canonical chunk's embedding, from this batch or from the collection.
+    """
+    try:
+        collection = get_project_collection(project_id)
+
+        # Identical chunks of the same document share an ID, so keep one of each
+        unique_chunks = {chunk.metadata['chunk_id']: chunk for chunk in chunks}
+        stored_ids = {
+            chunk.metadata[near_duplicates.CANONICAL_KEY] for chunk in unique_chunks.values()
+            if chunk.metadata.get(near_duplicates.CANONICAL_KEY) not in (None, *unique_chunks)
+        }
+        vectors: Dict[str, Any] = {}
+        if stored_ids:
+            stored = db_connector.with_chroma_retries(
+                lambda: collection.get(ids=list(stored_ids), include=['embeddings'])
+            )
+            vectors.update(zip(stored['ids'], stored['embeddings']))
+
+        def vector_source(chunk_id: str) -> str:
+            # A canonical chunk deleted in the meantime means embedding the chunk itself
+            canonical_id = unique_chunks[chunk_id].metadata.get(near_duplicates.CANONICAL_KEY)
+            return canonical_id if canonical_id in unique_chunks or canonical_id in vectors else chunk_id
+
+        embed_ids = [chunk_id for chunk_id in unique_chunks if vector_source(chunk_id) == chunk_id]
+        if embed_ids:
+            embedded = ChromaEmbeddingFunction()([unique_chunks[chunk_id].page_content for chunk_id in embed_ids])
+            vectors.update(zip(embed_ids, embedded))
+        if unique_chunks:
+            logging.info(
+                f"Embedded {len(embed_ids)} of {len(unique_chunks)} chunks; the rest reuse a near-duplicate's embedding."
+            )
+            # Upserts are keyed by chunk ID, so a retried call cannot duplicate chunks
+            with metrics.timed("chroma_upsert"):
+                db_connector.with_chroma_retries(lambda: collection.upsert(
+                    documents=[chunk.page_content for chunk in unique_chunks.values()],
+                    metadatas=[chunk.metadata for chunk in unique_chunks.values()],
+                    embeddings=[vectors[vector_source(chunk_id)] for chunk_id in unique_chunks],
+                    ids=list(unique_chunks.keys())
+                ))
+
         # Add a verification step here
         count = collection.count()
-        logging.info(f"ChromaDB collection '{collection_name}' populated with {count} documents.")
-        
+        logging.info(f"ChromaDB collection 'project_{project_id}' populated with {count} documents.")
+
     except Exception as e:
         logging.error(f"Failed to populate ChromaDB: {e}")
         raise e
 
-async def populate_knowledge_graph(project_id: str, chunks: List[Document]) -> None:
+@lru_cache(maxsize=1)
+def load_relationship_rules() -> Dict[str, str]:
+    """Loads the keyword -> relationship type rules from the configured JSON file."""
+    with open(ingestion_settings.RELATIONSHIP_RULES_PATH, encoding="utf-8") as rules_file:
+        rules = json.load(rules_file)
+    return {keyword.lower(): rel_type for keyword, rel_type in rules.items()}
+
+def build_relationship_matcher(document_names: Set[str], relationship_rules: Dict[str, str]) -> PatternMatcher:
+    """
+    Compiles a project's document names and relationship keywords into one
+    matcher. Hits are ("document", name) or ("relationship", rel_type).
+    """
+    patterns = [(name.lower(), ("document", name)) for name in document_names]
+    patterns += [(keyword, ("relationship", rel_type)) for keyword, rel_type in relationship_rules.items()]
+    return PatternMatcher(patterns)
+
+def extract_relationships(writer: GraphWriter, chunks: List[Document], target_names: Set[str]) -> None:
+    """Adds a rule-based edge from each chunk's document to every target document it mentions."""
+    if not target_names:
+        return
+
+    # One automaton finds every document-name and keyword hit per chunk
+    matcher = build_relationship_matcher(target_names, load_relationship_rules())
+    for chunk in chunks:
+        source_doc = chunk.metadata['source_document']
+        hits = matcher.find(chunk.page_content.lower())
+
+        mentioned_docs = {value for kind, value in hits if kind == "document" and value != source_doc}
+        rel_types = {value for kind, value in hits if kind == "relationship"}
+        for doc_name in mentioned_docs:
+            for rel_type in rel_types:
+                writer.add_relationship(source_doc, doc_name, rel_type)
+
+def populate_knowledge_graph(project_id: str, chunks: List[Document]) -> None:
     """Populates the Neo4j knowledge graph with entities and relationships."""
     try:
         neo4j_driver = db_connector.get_neo4j_driver()
         if not neo4j_driver:
             raise ConnectionError("Neo4j driver is not connected.")
 
-        # --- Rule-Based Extraction ---
-        relationship_rules = {
-            "amend": "AMENDS",
-            "reference": "REFERENCES",
-            "supersede": "SUPERSEDES",
-            "made to the agreement": "AMENDS",
-            "is governed by": "GOVERNED_BY",
-            "this agreement and the": "REFERENCES"
-        }
-        
         document_names = {chunk.metadata['source_document'] for chunk in chunks}
 
-        # First, create a node for the project and each document
-        with neo4j_driver.session() as session:
-            session.run("MERGE (p:Project {id: $id})", id=project_id)
-            for doc_name in document_names:
-                session.run(
-                    "MERGE (d:Document {name: $name, project_id: $pid})",
-                    name=doc_name,
-                    pid=project_id
-                )
-                session.run(
-                    """
-                    MATCH (p:Project {id: $pid})
-                    MATCH (d:Document {name: $dname})
-                    MERGE (p)-[:CONTAINS_DOCUMENT]->(d)
-                    """,
-                    pid=project_id,
-                    dname=doc_name
-                )
-        
-        # Then, iterate through chunks to find relationships
-        for chunk in chunks:
-            chunk_text = chunk.page_content.lower()
-            source_doc = chunk.metadata['source_document']
-            
-            for doc_name in document_names:
-                if doc_name != source_doc and doc_name.lower() in chunk_text:
-                    for keyword, rel_type in relationship_rules.items():
-                        if keyword in chunk_text:
-                            with neo4j_driver.session() as session:
-                                session.run(
-                                    """
-                                    MATCH (s:Document {name: $sname, project_id: $pid})
-                                    MATCH (t:Document {name: $tname, project_id: $pid})
-                                    MERGE (s)-[:REL {type: $rel_type}]->(t)
-                                    """,
-                                    sname=source_doc,
-                                    tname=doc_name,
-                                    rel_type=rel_type,
-                                    pid=project_id
-                                )
+        # First, collect a node for each document
+        writer = GraphWriter(project_id)
+        for doc_name in document_names:
+            writer.add_document(doc_name)
+
+        # --- Rule-Based Extraction ---
+        extract_relationships(writer, chunks, document_names)
+
+        # Write all nodes and edges in one transaction
+        writer.flush(neo4j_driver)
         logging.info(f"Successfully populated Neo4j knowledge graph for project {project_id} using rules.")
     
     except Exception as e:
         logging.error(f"Failed to populate Neo4j: {e}")
-        raise e
\ No newline at end of file
+        raise e
+
+def update_knowledge_graph(project_id: str, new_chunks: List[Document], existing_chunks: List[Document]) -> None:
+    """
+    Adds new documents to a project's graph. Only edges touching the new
+    documents are computed: new chunks against every document, and existing
+    chunks against the new document names.
+    """
+    try:
+        neo4j_driver = db_connector.get_neo4j_driver()
+        if not neo4j_driver:
+            raise ConnectionError("Neo4j driver is not connected.")
+
+        new_names = {chunk.metadata['source_document'] for chunk in new_chunks}
+        existing_names = {chunk.metadata['source_document'] for chunk in existing_chunks}
+
+        writer = GraphWriter(project_id)
+        for doc_name in new_names:
+            writer.add_document(doc_name)
+
+        extract_relationships(writer, new_chunks, new_names | existing_names)
+        extract_relationships(writer, existing_chunks, new_names)
+
+        writer.flush(neo4j_driver)
+        logging.info(f"Updated Neo4j knowledge graph for project {project_id} with {len(new_names)} documents.")
+
+    except Exception as e:
+        logging.error(f"Failed to update Neo4j: {e}")
+        raise e
+
+def remove_document_from_graph(project_id: str, document_name: str) -> None:
+    """Deletes a document node and all of its edges."""
+    neo4j_driver = db_connector.get_neo4j_driver()
+    if not neo4j_driver:
+        raise ConnectionError("Neo4j driver is not connected.")
+
+    with metrics.timed("neo4j_write"), neo4j_driver.session() as session:
+        session.execute_write(
+            lambda tx: tx.run(
+                "MATCH (d:Document {project_id: $pid, name: $name}) DETACH DELETE d",
+                pid=project_id,
+                name=document_name
+            ).consume()
+        )
@@ -0,0 +1,166 @@
+# backend/core/jobs.py
+
+import uuid
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, Any, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+# --- Pydantic model for loading job queue settings from a .env file ---
+class JobSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
+
+    INGESTION_MAX_WORKERS: int = 2
+    INGESTION_MAX_PENDING_JOBS: int = 20
+    JOB_HISTORY_LIMIT: int = 200
+
+job_settings = JobSettings()
+
+# Job status values
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+class JobQueueFullError(RuntimeError):
+    """Raised when the ingestion queue has no room for another job."""
+
+
+# --- Global worker pool and job registry ---
+_executor: Optional[ThreadPoolExecutor] = None
+_jobs: Dict[str, Dict[str, Any]] = {}
+_project_jobs: Dict[str, str] = {}
+_update_hooks: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+_lock = threading.Lock()
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Returns the shared worker pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=job_settings.INGESTION_MAX_WORKERS,
+            thread_name_prefix="ingestion"
+        )
+    return _executor
+
+def _prune_finished_jobs() -> None:
+    """Drops the oldest finished jobs once the history limit is exceeded. Caller holds the lock."""
+    finished = [job for job in _jobs.values() if job["status"] in (JOB_COMPLETED, JOB_FAILED)]
+    overflow = len(_jobs) - job_settings.JOB_HISTORY_LIMIT
+    if overflow <= 0:
+        return
+    finished.sort(key=lambda job: job["updated_at"])
+    for job in finished[:overflow]:
+        _jobs.pop(job["job_id"], None)
+        _update_hooks.pop(job["job_id"], None)
+        if _project_jobs.get(job["project_id"]) == job["job_id"]:
+            _project_jobs.pop(job["project_id"], None)
+
+def _notify(job_id: str, snapshot: Dict[str, Any], on_update: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+    """Passes a job snapshot to its update hook. Called without the lock held."""
+    if on_update:
+        try:
+            on_update(snapshot)
+        except Exception as e:
+            logging.error(f"Update hook for job {job_id} failed: {e}")
+
+def _update_job(job_id: str, **fields) -> None:
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return
+        job.update(fields)
+        job["updated_at"] = _now()
+        snapshot = dict(job)
+        on_update = _update_hooks.get(job_id)
+
+    _notify(job_id, snapshot, on_update)
+
+def _run_job(job_id: str, func: Callable[..., Any], args: tuple) -> None:
+    """Executes a job on a worker thread and records its outcome."""
+    def report_progress(stage: str, progress: float) -> None:
+        _update_job(job_id, stage=stage, progress=round(min(max(progress, 0.0), 100.0), 1))
+
+    _update_job(job_id, status=JOB_RUNNING, stage="starting")
+    try:
+        result = func(*args, progress=report_progress)
+        _update_job(job_id, status=JOB_COMPLETED, stage="done", progress=100.0, result=result)
+        logging.info(f"Job {job_id} completed.")
+    except Exception as e:
+        logging.error(f"Job {job_id} failed: {e}")
+        _update_job(job_id, status=JOB_FAILED, error=str(e))
+
+def submit_job(
+    project_id: str,
+    func: Callable[..., Any],
+    *args,
+    on_update: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> str:
+    """
+    Queues `func(*args, progress=callback)` on the bounded worker pool and
+    returns the new job ID immediately. `on_update(job)` is called with a
+    snapshot of the job once it is queued and after every later state or
+    progress change.
+    """
+    with _lock:
+        pending = sum(1 for job in _jobs.values() if job["status"] in (JOB_QUEUED, JOB_RUNNING))
+        if pending >= job_settings.INGESTION_MAX_PENDING_JOBS:
+            raise JobQueueFullError("Too many ingestion jobs are pending. Please retry later.")
+
+        job_id = str(uuid.uuid4())
+        _jobs[job_id] = {
+            "job_id": job_id,
+            "project_id": project_id,
+            "status": JOB_QUEUED,
+            "stage": "queued",
+            "progress": 0.0,
+            "error": None,
+            "result": None,
+            "created_at": _now(),
+            "updated_at": _now(),
+        }
+        _project_jobs[project_id] = job_id
+        if on_update:
+            _update_hooks[job_id] = on_update
+        snapshot = dict(_jobs[job_id])
+        _prune_finished_jobs()
+
+    # Record the queued state before a worker can report any later one
+    _notify(job_id, snapshot, on_update)
+    # Run in a copy of the caller's context so the job's logs keep its trace ID
+    _get_executor().submit(contextvars.copy_context().run, _run_job, job_id, func, args)
+    logging.info(f"Queued job {job_id} for project {project_id}.")
+    return job_id
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Returns a snapshot of a job's state, or None if it is unknown."""
+    with _lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
+
+def get_project_job(project_id: str) -> Optional[Dict[str, Any]]:
+    """Returns a snapshot of the most recent job submitted for a project."""
+    with _lock:
+        job_id = _project_jobs.get(project_id)
+        job = _jobs.get(job_id) if job_id else None
+        return dict(job) if job else None
+
+def shutdown_workers() -> None:
+    """Stops the worker pool, letting running jobs finish."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+        logging.info("Ingestion worker pool shut down.")
@@ -0,0 +1,188 @@
+# backend/core/lexical_index.py
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+# --- Pydantic model for loading lexical index settings from a .env file ---
+class LexicalIndexSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
+
+    LEXICAL_INDEX_DIR: str = "./data/lexical_index"
+    BM25_K1: float = 1.5
+    BM25_B: float = 0.75
+
+lexical_index_settings = LexicalIndexSettings()
+
+# Words, plus dotted section numbers such as "5.2.1" kept as one token
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "was", "what", "which", "who", "with",
+})
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    In-memory inverted index over one project's chunks, scored with Okapi
+    BM25. Chunks are keyed by chunk_id; the text itself stays in Chroma.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lengths: Dict[str, int] = {}
+        self._sources: Dict[str, str] = {}
+        self._term_counts: Dict[str, Dict[str, int]] = {}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def _add(self, chunk_id: str, source_document: str, term_counts: Dict[str, int]) -> None:
+        self._remove(chunk_id)
+        self._term_counts[chunk_id] = term_counts
+        self._sources[chunk_id] = source_document
+        self._lengths[chunk_id] = sum(term_counts.values())
+        self._total_length += self._lengths[chunk_id]
+        for term, count in term_counts.items():
+            self._postings[term][chunk_id] = count
+
+    def _remove(self, chunk_id: str) -> None:
+        term_counts = self._term_counts.pop(chunk_id, None)
+        if term_counts is None:
+            return
+        self._total_length -= self._lengths.pop(chunk_id)
+        self._sources.pop(chunk_id, None)
+        for term in term_counts:
+            postings = self._postings[term]
+            postings.pop(chunk_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def add_chunks(self, chunks: List[Document]) -> None:
+        with self._lock:
+            for chunk in chunks:
+                self._add(
+                    chunk.metadata['chunk_id'],
+                    chunk.metadata['source_document'],
+                    dict(Counter(tokenize(chunk.page_content)))
+                )
+
+    def remove_document(self, source_document: str) -> None:
+        with self._lock:
+            for chunk_id in [cid for cid, source in self._sources.items() if source == source_document]:
+                self._remove(chunk_id)
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Returns up to k (chunk_id, score) pairs, best first."""
+        settings = lexical_index_settings
+        with self._lock:
+            total_chunks = len(self._lengths)
+            if not total_chunks:
+                return []
+            average_length = self._total_length / total_chunks
+
+            scores: Dict[str, float] = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (total_chunks - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, count in postings.items():
+                    norm = settings.BM25_K1 * (1 - settings.BM25_B + settings.BM25_B * self._lengths[chunk_id] / average_length)
+                    scores[chunk_id] += idf * count * (settings.BM25_K1 + 1) / (count + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def to_json(self) -> Dict:
+        with self._lock:
+            return {
+                chunk_id: {"source_document": self._sources[chunk_id], "terms": terms}
+                for chunk_id, terms in self._term_counts.items()
+            }
+
+    @classmethod
+    def from_json(cls, data: Dict) -> "BM25Index":
+        index = cls()
+        for chunk_id, entry in data.items():
+            index._add(chunk_id, entry["source_document"], entry["terms"])
+        return index
+
+
+# --- Per-project index storage ---
+# Each loaded index is kept with the modification time and size of the file
+# it was read from, so a change written by another worker process is picked up
+_indexes: Dict[str, Tuple[Tuple[int, int], BM25Index]] = {}
+_indexes_lock = threading.Lock()
+
+def _index_path(project_id: str) -> str:
+    return os.path.join(lexical_index_settings.LEXICAL_INDEX_DIR, f"{project_id}.json")
+
+def _file_version(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+def _save_index(project_id: str, index: BM25Index) -> None:
+    os.makedirs(lexical_index_settings.LEXICAL_INDEX_DIR, exist_ok=True)
+    path = _index_path(project_id)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as index_file:
+        json.dump(index.to_json(), index_file)
+    os.replace(f"{path}.tmp", path)
+    with _indexes_lock:
+        _indexes[project_id] = (_file_version(path), index)
+
+def get_project_index(project_id: str) -> Optional[BM25Index]:
+    """Returns a project's index, (re)loading it from disk when the file has changed."""
+    with _indexes_lock:
+        path = _index_path(project_id)
+        try:
+            version = _file_version(path)
+        except FileNotFoundError:
+            _indexes.pop(project_id, None)
+            return None
+        cached = _indexes.get(project_id)
+        if cached and cached[0] == version:
+            return cached[1]
+        with open(path, encoding="utf-8") as index_file:
+            index = BM25Index.from_json(json.load(index_file))
+        _indexes[project_id] = (version, index)
+        return index
+
+def index_chunks(project_id: str, chunks: List[Document]) -> None:
+    """Adds chunks to a project's index, creating it if needed, and persists it."""
+    index = get_project_index(project_id) or BM25Index()
+    index.add_chunks(chunks)
+    _save_index(project_id, index)
+    logging.info(f"Lexical index for project {project_id} holds {len(index)} chunks.")
+
+def remove_document(project_id: str, source_document: str) -> None:
+    """Drops one document's chunks from a project's index."""
+    index = get_project_index(project_id)
+    if index is None:
+        return
+    index.remove_document(source_document)
+    _save_index(project_id, index)
+
+def delete_project_index(project_id: str) -> None:
+    with _indexes_lock:
+        _indexes.pop(project_id, None)
+    path = _index_path(project_id)
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,117 @@
+# backend/core/loaders.py
+
+import os
+import logging
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+from langchain_core.documents import Document
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+# --- Pydantic model for loading document loader settings from a .env file ---
+class LoaderSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
+
+    LOADER_MAX_PROCESSES: int = max(1, (os.cpu_count() or 2) - 1)
+    # PDFs shorter than this are parsed in-process; pool start-up isn't worth it
+    PDF_PARALLEL_MIN_PAGES: int = 32
+    PDF_PAGES_PER_TASK: int = 16
+
+loader_settings = LoaderSettings()
+
+# --- Global process pool for PDF parsing ---
+_process_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        with _pool_lock:
+            if _process_pool is None:
+                # Spawn rather than fork: the server is multi-threaded, and a forked
+                # child could inherit a lock held by another thread and deadlock
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=loader_settings.LOADER_MAX_PROCESSES,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _process_pool
+
+def shutdown_process_pool() -> None:
+    """Stops the PDF parsing worker processes."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=True, cancel_futures=True)
+        _process_pool = None
+
+def _extract_page_range(file_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """Extracts the text of pages [start, end) of a PDF. Runs in a worker process."""
+    with fitz.open(file_path) as pdf:
+        return [(page_number, pdf[page_number].get_text()) for page_number in range(start, end)]
+
+def _page_document(file_path: str, page_number: int, total_pages: int, text: str) -> Document:
+    return Document(
+        page_content=text,
+        metadata={
+            "source": file_path,
+            "file_path": file_path,
+            "page": page_number,
+            "total_pages": total_pages,
+        }
+    )
+
+def iter_pdf_pages(file_path: str) -> Iterator[Document]:
+    """
+    Yields a PDF's pages in order, one Document per page. Long PDFs are
+    parsed in page ranges across the process pool; only a bounded window
+    of ranges is in flight, so the whole document is never held at once.
+    """
+    with fitz.open(file_path) as pdf:
+        total_pages = pdf.page_count
+
+    if total_pages < loader_settings.PDF_PARALLEL_MIN_PAGES:
+        with fitz.open(file_path) as pdf:
+            for page_number in range(total_pages):
+                yield _page_document(file_path, page_number, total_pages, pdf[page_number].get_text())
+        return
+
+    pool = _get_process_pool()
+    step = loader_settings.PDF_PAGES_PER_TASK
+    ranges = deque((start, min(start + step, total_pages)) for start in range(0, total_pages, step))
+    window = loader_settings.LOADER_MAX_PROCESSES * 2
+    in_flight = deque()
+
+    logging.info(f"Parsing {total_pages} pages of {os.path.basename(file_path)} across {loader_settings.LOADER_MAX_PROCESSES} processes.")
+    try:
+        while ranges or in_flight:
+            while ranges and len(in_flight) < window:
+                start, end = ranges.popleft()
+                in_flight.append(pool.submit(_extract_page_range, file_path, start, end))
+            for page_number, text in in_flight.popleft().result():
+                yield _page_document(file_path, page_number, total_pages, text)
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+def iter_document_pages(file_path: str) -> Iterator[Document]:
+    """Lazily yields the pages (or whole-file Documents) of any supported file."""
+    from langchain_community.document_loaders import Docx2txtLoader, TextLoader
+
+    file_extension = file_path.split('.')[-1].lower()
+    if file_extension == 'pdf':
+        return iter_pdf_pages(file_path)
+    elif file_extension == 'docx':
+        return Docx2txtLoader(file_path).lazy_load()
+    # Add more loaders for other file types here
+    elif file_extension in ['txt', 'eml']:
+        return TextLoader(file_path).lazy_load()
+    else:
+        raise ValueError(f"Unsupported file type: {file_extension}")
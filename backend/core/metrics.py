@@ -0,0 +1,114 @@
+# backend/core/metrics.py
+
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Tuple
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+# prometheus_client is optional: without it timings are still logged at
+# debug level, but nothing is exported
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+except ImportError:
+    Counter = Histogram = None
+
+
+# --- Pydantic model for loading metrics settings from a .env file ---
+class MetricsSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
+
+    METRICS_ENABLED: bool = True
+
+metrics_settings = MetricsSettings()
+
+
+# --- Request-scoped trace ID ---
+TRACE_ID_HEADER = "X-Trace-Id"
+_trace_id: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+def get_trace_id() -> Optional[str]:
+    return _trace_id.get()
+
+def set_trace_id(trace_id: Optional[str]):
+    """Binds a trace ID to the current context and returns a token for reset_trace_id."""
+    return _trace_id.set(trace_id)
+
+def reset_trace_id(token) -> None:
+    _trace_id.reset(token)
+
+class TraceIdLogFilter(logging.Filter):
+    """Adds the current trace ID to every log record as `trace_id`."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = get_trace_id() or "-"
+        return True
+
+
+# --- Prometheus metrics ---
+_enabled = metrics_settings.METRICS_ENABLED and Histogram is not None
+
+# Stages range from sub-millisecond cache reads to minute-long generations
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+if _enabled:
+    STAGE_SECONDS = Histogram(
+        "clausewise_stage_seconds", "Time spent in each processing stage.",
+        ["stage"], buckets=STAGE_BUCKETS
+    )
+    REQUEST_SECONDS = Histogram(
+        "clausewise_request_seconds", "HTTP request latency.",
+        ["method", "route", "status"], buckets=STAGE_BUCKETS
+    )
+    LLM_TOKENS = Counter(
+        "clausewise_llm_tokens_total", "Tokens sent to and generated by the LLM.",
+        ["direction"]
+    )
+    LLM_TOKENS_PER_SECOND = Histogram(
+        "clausewise_llm_tokens_per_second", "Generation throughput per LLM call.",
+        buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+    )
+
+def is_enabled() -> bool:
+    return _enabled
+
+def observe_stage(stage: str, seconds: float) -> None:
+    if _enabled:
+        STAGE_SECONDS.labels(stage=stage).observe(seconds)
+    logging.debug(f"Stage '{stage}' took {seconds:.4f}s (trace {get_trace_id() or '-'}).")
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Times the enclosed block and records it under `stage`, whether or not it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+def record_request(method: str, route: str, status_code: int, seconds: float) -> None:
+    if _enabled:
+        REQUEST_SECONDS.labels(method=method, route=route, status=str(status_code)).observe(seconds)
+
+def record_generation(tokens_in: int, tokens_out: int, seconds: float) -> None:
+    """Records one LLM call's prompt and output token counts and its throughput."""
+    if not _enabled:
+        return
+    LLM_TOKENS.labels(direction="in").inc(tokens_in)
+    LLM_TOKENS.labels(direction="out").inc(tokens_out)
+    if seconds > 0:
+        LLM_TOKENS_PER_SECOND.observe(tokens_out / seconds)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Returns the exposition-format payload and its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
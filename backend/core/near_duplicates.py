@@ -0,0 +1,140 @@
+# backend/core/near_duplicates.py
+
+import hashlib
+import random
+import re
+from typing import Dict, List, Sequence, Tuple
+
+from langchain_core.documents import Document
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+# --- Pydantic model for loading near-duplicate detection settings from a .env file ---
+class NearDuplicateSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
+
+    NEAR_DUPLICATES_ENABLED: bool = True
+    # Estimated Jaccard similarity of word shingles at which two chunks count as copies
+    NEAR_DUPLICATE_THRESHOLD: float = 0.85
+    NEAR_DUPLICATE_SHINGLE_WORDS: int = 5
+    # Permutations are split into bands for LSH; PERMUTATIONS must be a multiple of BANDS.
+    # With 64 / 16 (4 rows per band) pairs above ~0.5 similarity become candidates.
+    MINHASH_PERMUTATIONS: int = 64
+    MINHASH_BANDS: int = 16
+
+near_duplicate_settings = NearDuplicateSettings()
+
+# Metadata key on a chunk whose embedding is reused from a near-identical
+# chunk, holding that chunk's ID. The chunk keeps its own text.
+CANONICAL_KEY = "canonical_id"
+
+_MASK = (1 << 64) - 1
+_WORD = re.compile(r"\w+")
+
+
+class MinHasher:
+    """
+    Computes MinHash signatures of word-shingle sets. Shingles are hashed to
+    64 bits once; each permutation is then x -> a * x + b mod 2**64 with an
+    odd, fixed-seed `a`, which is a bijection and needs no big-int modulo.
+    """
+
+    def __init__(self, permutations: int, shingle_words: int, seed: int = 1):
+        rng = random.Random(seed)
+        self.shingle_words = shingle_words
+        self.permutations = [(rng.getrandbits(64) | 1, rng.getrandbits(64)) for _ in range(permutations)]
+
+    def shingles(self, text: str) -> List[int]:
+        words = _WORD.findall(text.lower())
+        size = self.shingle_words
+        grams = {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))} if words else set()
+        return [
+            int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "little")
+            for gram in grams
+        ]
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """Returns the signature, or () for text without words, which never matches anything."""
+        hashes = self.shingles(text)
+        if not hashes:
+            return ()
+        return tuple(
+            min([(a * value + b) & _MASK for value in hashes])
+            for a, b in self.permutations
+        )
+
+def estimate_similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    if not first or not second:
+        return 0.0
+    return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+def group_near_duplicates(texts: List[str]) -> List[int]:
+    """
+    Groups near-identical texts with MinHash and LSH banding. Returns, for
+    each text, the index of its group's canonical member: the earliest
+    text of the group, so the canonical of a canonical is itself.
+    """
+    settings = near_duplicate_settings
+    hasher = MinHasher(settings.MINHASH_PERMUTATIONS, settings.NEAR_DUPLICATE_SHINGLE_WORDS)
+    signatures = [hasher.signature(text) for text in texts]
+
+    parent = list(range(len(texts)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    # Texts sharing any band are candidates; each is verified against the
+    # bucket's first member, which keeps big buckets of copies linear
+    rows = settings.MINHASH_PERMUTATIONS // settings.MINHASH_BANDS
+    for band in range(settings.MINHASH_BANDS):
+        buckets: Dict[Tuple[int, ...], int] = {}
+        for index, signature in enumerate(signatures):
+            if not signature:
+                continue
+            key = signature[band * rows:(band + 1) * rows]
+            first = buckets.setdefault(key, index)
+            if first == index:
+                continue
+            if estimate_similarity(signatures[first], signature) >= settings.NEAR_DUPLICATE_THRESHOLD:
+                root, other = find(first), find(index)
+                if root != other:
+                    parent[max(root, other)] = min(root, other)
+
+    return [find(index) for index in range(len(texts))]
+
+
+def normalize_text(text: str) -> str:
+    """Lowercases and collapses whitespace, so copies differing only in layout compare equal."""
+    return " ".join(text.lower().split())
+
+def mark_near_duplicates(chunks: List[Document], existing: Sequence[Document] = ()) -> int:
+    """
+    Groups `chunks` with each other and with the stored chunks in
+    `existing`. A chunk that is not its group's canonical member gets
+    `canonical_id` in its metadata and reuses that chunk's embedding
+    instead of being embedded itself; its own text is kept as it is.
+    Stored chunks are preferred as canonical. Returns how many chunks
+    were marked.
+    """
+    if not near_duplicate_settings.NEAR_DUPLICATES_ENABLED:
+        return 0
+
+    candidates = list(existing) + list(chunks)
+    canonical_of = group_near_duplicates([chunk.page_content for chunk in candidates])
+
+    marked = 0
+    for index in range(len(existing), len(candidates)):
+        chunk = candidates[index]
+        canonical_id = candidates[canonical_of[index]].metadata['chunk_id']
+        # Identical text in the same document already shares the canonical's ID
+        if canonical_id != chunk.metadata['chunk_id']:
+            chunk.metadata[CANONICAL_KEY] = canonical_id
+            marked += 1
+    return marked
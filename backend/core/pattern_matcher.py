@@ -0,0 +1,65 @@
+# backend/core/pattern_matcher.py
+
+from collections import deque
+from typing import Dict, Generic, Iterable, List, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class PatternMatcher(Generic[T]):
+    """
+    Aho-Corasick automaton over a fixed set of patterns. Finds every pattern
+    occurring in a text in a single pass, regardless of how many patterns
+    there are. Each pattern carries one or more payloads, which are what
+    `find` returns.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, T]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[T]] = [[]]
+
+        for pattern, payload in patterns:
+            if not pattern:
+                continue
+            self._add_pattern(pattern, payload)
+        self._build_failure_links()
+
+    def _add_pattern(self, pattern: str, payload: T) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append(payload)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # Inherit matches that end at the fallback state
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> Set[T]:
+        """Returns the payloads of every pattern that occurs in the text."""
+        found: Set[T] = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
@@ -0,0 +1,240 @@
+# backend/core/project_registry.py
+
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+# --- Pydantic model for loading project registry settings from a .env file ---
+class ProjectRegistrySettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
+
+    PROJECT_REGISTRY_BACKEND: str = "sqlite"
+    PROJECT_REGISTRY_PATH: str = "./data/projects.sqlite3"
+
+project_registry_settings = ProjectRegistrySettings()
+
+
+class ProjectRegistry(ABC):
+    """
+    Durable record of every project: its documents, chunk counts and the
+    status of its latest ingestion job. Shared by all API worker processes.
+    """
+
+    @abstractmethod
+    def create_project(self, project_id: str, documents: List[str]) -> None:
+        ...
+
+    @abstractmethod
+    def get_project(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the project's status fields plus `documents` and
+        `chunk_counts`, or None. `ingested` is true once any of its jobs has
+        completed, so a later failed job leaves the project usable.
+        `revision` grows whenever the stored documents change, so worker
+        processes can tell when their in-memory caches for it are stale.
+        """
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the last recorded state of a job, or None."""
+
+    @abstractmethod
+    def set_documents(self, project_id: str, documents: List[str]) -> None:
+        """Replaces the document list, keeping chunk counts for documents that remain."""
+
+    @abstractmethod
+    def remove_document(self, project_id: str, document_name: str) -> None:
+        ...
+
+    @abstractmethod
+    def update_job(self, job: Dict[str, Any]) -> None:
+        """Records the latest state of a project's ingestion job."""
+
+    @abstractmethod
+    def set_chunk_counts(self, project_id: str, chunk_counts: Dict[str, int]) -> None:
+        ...
+
+    @abstractmethod
+    def delete_project(self, project_id: str) -> None:
+        ...
+
+
+class SQLiteProjectRegistry(ProjectRegistry):
+    """ProjectRegistry on a local SQLite file, in WAL mode so worker processes can share it."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS projects (
+                    project_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    error TEXT,
+                    job_id TEXT,
+                    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE INDEX IF NOT EXISTS idx_projects_job_id ON projects (job_id);
+                CREATE TABLE IF NOT EXISTS project_documents (
+                    project_id TEXT NOT NULL REFERENCES projects (project_id) ON DELETE CASCADE,
+                    name TEXT NOT NULL,
+                    chunk_count INTEGER,
+                    PRIMARY KEY (project_id, name)
+                );
+                """
+            )
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(projects)")}
+            if "ingested" not in columns:
+                self._conn.execute("ALTER TABLE projects ADD COLUMN ingested INTEGER NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE projects SET ingested = 1 WHERE status = 'completed'")
+            if "revision" not in columns:
+                self._conn.execute("ALTER TABLE projects ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+            self._conn.commit()
+
+    def create_project(self, project_id: str, documents: List[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO projects (project_id, status, stage) VALUES (?, 'queued', 'queued')",
+                (project_id,)
+            )
+            self._conn.executemany(
+                "INSERT INTO project_documents (project_id, name) VALUES (?, ?)",
+                [(project_id, name) for name in documents]
+            )
+            self._conn.commit()
+
+    def get_project(self, project_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+            if row is None:
+                return None
+            documents = self._conn.execute(
+                "SELECT name, chunk_count FROM project_documents WHERE project_id = ? ORDER BY rowid",
+                (project_id,)
+            ).fetchall()
+        project = dict(row)
+        project["ingested"] = bool(project["ingested"])
+        project["documents"] = [document["name"] for document in documents]
+        project["chunk_counts"] = {
+            document["name"]: document["chunk_count"]
+            for document in documents if document["chunk_count"] is not None
+        }
+        return project
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, project_id, status, stage, progress, error FROM projects WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def set_documents(self, project_id: str, documents: List[str]) -> None:
+        with self._lock:
+            placeholders = ",".join("?" * len(documents))
+            self._conn.execute(
+                f"DELETE FROM project_documents WHERE project_id = ? AND name NOT IN ({placeholders})",
+                (project_id, *documents)
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO project_documents (project_id, name) VALUES (?, ?)",
+                [(project_id, name) for name in documents]
+            )
+            self._conn.commit()
+
+    def remove_document(self, project_id: str, document_name: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM project_documents WHERE project_id = ? AND name = ?",
+                (project_id, document_name)
+            )
+            self._conn.execute(
+                "UPDATE projects SET revision = revision + 1, updated_at = CURRENT_TIMESTAMP WHERE project_id = ?",
+                (project_id,)
+            )
+            self._conn.commit()
+
+    def update_job(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE projects
+                SET job_id = ?, status = ?, stage = ?, progress = ?, error = ?,
+                    ingested = MAX(ingested, ?), revision = revision + ?, updated_at = CURRENT_TIMESTAMP
+                WHERE project_id = ?
+                """,
+                (
+                    job["job_id"], job["status"], job["stage"], job["progress"], job["error"],
+                    int(job["status"] == "completed"), int(job["status"] == "completed"), job["project_id"]
+                )
+            )
+            self._conn.commit()
+
+    def set_chunk_counts(self, project_id: str, chunk_counts: Dict[str, int]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE project_documents SET chunk_count = ? WHERE project_id = ? AND name = ?",
+                [(count, project_id, name) for name, count in chunk_counts.items()]
+            )
+            self._conn.commit()
+
+    def delete_project(self, project_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM project_documents WHERE project_id = ?", (project_id,))
+            self._conn.execute("DELETE FROM projects WHERE project_id = ?", (project_id,))
+            self._conn.commit()
+
+
+# Available registry backends, selected by PROJECT_REGISTRY_BACKEND
+REGISTRY_BACKENDS = {
+    "sqlite": lambda: SQLiteProjectRegistry(project_registry_settings.PROJECT_REGISTRY_PATH),
+}
+
+# --- Global project registry ---
+_project_registry: Optional[ProjectRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_project_registry() -> ProjectRegistry:
+    """Returns the configured project registry, opening it on first use."""
+    global _project_registry
+    if _project_registry is None:
+        with _registry_lock:
+            if _project_registry is None:
+                backend = project_registry_settings.PROJECT_REGISTRY_BACKEND
+                if backend not in REGISTRY_BACKENDS:
+                    raise ValueError(f"Unknown project registry backend: {backend}")
+                _project_registry = REGISTRY_BACKENDS[backend]()
+                logging.info(f"Project registry opened with the '{backend}' backend.")
+    return _project_registry
+
+def record_job_update(job: Dict[str, Any], previous_documents: Optional[List[str]] = None) -> None:
+    """
+    Job update hook: mirrors job progress into the registry, plus chunk
+    counts on completion. For a job adding documents, `previous_documents`
+    is the document list before it, restored if the job fails.
+    """
+    registry = get_project_registry()
+    registry.update_job(job)
+    if job["status"] == "completed" and isinstance(job.get("result"), dict):
+        registry.set_chunk_counts(job["project_id"], job["result"])
+    elif job["status"] == "failed" and previous_documents is not None:
+        registry.set_documents(job["project_id"], previous_documents)
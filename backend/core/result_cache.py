@@ -0,0 +1,101 @@
+# backend/core/result_cache.py
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+# --- Pydantic model for loading result cache settings from a .env file ---
+class ResultCacheSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
+
+    RESULT_CACHE_PATH: str = "./data/feature_results.sqlite3"
+
+result_cache_settings = ResultCacheSettings()
+
+
+class ResultCache:
+    """
+    Persistent store of feature outputs keyed by (project_id, feature_name,
+    model_id, prompt_hash). A lookup only hits when both the model and the
+    prompt template match the ones that produced the stored result.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS feature_results (
+                    project_id TEXT NOT NULL,
+                    feature_name TEXT NOT NULL,
+                    model_id TEXT NOT NULL,
+                    prompt_hash TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (project_id, feature_name, model_id, prompt_hash)
+                )
+                """
+            )
+            self._conn.commit()
+
+    def get(self, project_id: str, feature_name: str, model_id: str, prompt_hash: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT result FROM feature_results
+                WHERE project_id = ? AND feature_name = ? AND model_id = ? AND prompt_hash = ?
+                """,
+                (project_id, feature_name, model_id, prompt_hash)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, project_id: str, feature_name: str, model_id: str, prompt_hash: str, result: Any) -> None:
+        with self._lock:
+            # Results from an older model or prompt can never hit again, so drop them
+            self._conn.execute(
+                "DELETE FROM feature_results WHERE project_id = ? AND feature_name = ?",
+                (project_id, feature_name)
+            )
+            self._conn.execute(
+                """
+                INSERT INTO feature_results (project_id, feature_name, model_id, prompt_hash, result)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (project_id, feature_name, model_id, prompt_hash, json.dumps(result, default=str))
+            )
+            self._conn.commit()
+
+    def invalidate_project(self, project_id: str) -> None:
+        """Drops every cached result for a project, e.g. after its documents change."""
+        with self._lock:
+            self._conn.execute("DELETE FROM feature_results WHERE project_id = ?", (project_id,))
+            self._conn.commit()
+        logging.info(f"Invalidated cached feature results for project {project_id}.")
+
+
+# --- Global result cache ---
+_result_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+def get_result_cache() -> ResultCache:
+    """Returns the shared result cache, opening it on first use."""
+    global _result_cache
+    if _result_cache is None:
+        with _cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache(result_cache_settings.RESULT_CACHE_PATH)
+    return _result_cache
@@ -0,0 +1,58 @@
+# backend/core/retrieval.py
+
+from typing import Any, Dict, List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from . import lexical_index, metrics
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retrieves a project's chunks by fusing dense (vector) and lexical (BM25)
+    rankings with reciprocal rank fusion. Exact terms such as section
+    numbers and party names that embeddings miss still rank via BM25.
+    """
+
+    project_id: str
+    vector_store: Any
+    k: int = 3
+    candidate_k: int = 10
+    # Standard RRF damping constant; larger values flatten the rank weights
+    rrf_k: int = 60
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        with metrics.timed("retrieval"):
+            return self._retrieve(query)
+
+    def _retrieve(self, query: str) -> List[Document]:
+        with metrics.timed("chroma_query"):
+            dense_docs = self.vector_store.similarity_search(
+                query, k=self.candidate_k, filter={"project_id": self.project_id}
+            )
+        with metrics.timed("bm25_search"):
+            index = lexical_index.get_project_index(self.project_id)
+            lexical_hits = index.search(query, self.candidate_k) if index else []
+
+        scores: Dict[str, float] = {}
+        docs_by_id: Dict[str, Document] = {}
+        for rank, doc in enumerate(dense_docs):
+            chunk_id = doc.metadata.get('chunk_id') or doc.page_content
+            docs_by_id[chunk_id] = doc
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+        for rank, (chunk_id, _) in enumerate(lexical_hits):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+
+        top_ids = sorted(scores, key=scores.get, reverse=True)[:self.k]
+
+        # Fetch the text of chunks only the lexical index found
+        missing_ids = [chunk_id for chunk_id in top_ids if chunk_id not in docs_by_id]
+        if missing_ids:
+            with metrics.timed("chroma_get"):
+                stored = self.vector_store.get(ids=missing_ids, include=['documents', 'metadatas'])
+            for chunk_id, text, metadata in zip(stored['ids'], stored['documents'], stored['metadatas']):
+                docs_by_id[chunk_id] = Document(page_content=text, metadata=metadata)
+
+        return [docs_by_id[chunk_id] for chunk_id in top_ids if chunk_id in docs_by_id]
@@ -0,0 +1,164 @@
+# backend/core/risk_engine.py
+
+import json
+import math
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+from ..dependencies import structured_output
+from .near_duplicates import normalize_text
+from .pattern_matcher import PatternMatcher
+
+
+# --- Pydantic model for loading risk analysis settings from a .env file ---
+class RiskSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
+
+    RISK_RULES_PATH: str = os.path.join(os.path.dirname(__file__), "risk_rules.json")
+    # A clause is a candidate once its keyword weights reach this score...
+    RISK_MIN_SCORE: float = 1.5
+    # ...or its embedding is this close to one of the risk prototypes
+    RISK_PROTOTYPE_SIMILARITY: float = 0.6
+    # Clauses of different documents this similar are checked for conflicts
+    RISK_CONFLICT_SIMILARITY: float = 0.8
+    RISK_NEIGHBOURS: int = 3
+    RISK_QUERY_BATCH_SIZE: int = 64
+    RISK_MAX_CANDIDATES: int = 40
+    RISK_MAX_CLAUSE_CHARS: int = 1500
+
+risk_settings = RiskSettings()
+
+RISK_LEVELS = ("Low", "Medium", "High")
+
+# Short descriptions of risky clauses; chunks whose embeddings land near one
+# are screened in even when they use none of the rule keywords
+RISK_PROTOTYPES = [
+    "One party bears unlimited liability for all losses and claims.",
+    "The agreement may be terminated immediately by one party without any reason.",
+    "One party may change the terms or fees at its own discretion.",
+    "A party gives up its rights to bring claims or seek remedies.",
+    "The obligations continue indefinitely and renew automatically.",
+]
+
+
+@lru_cache(maxsize=1)
+def load_risk_rules() -> Dict[str, Tuple[str, float]]:
+    """Loads the keyword -> (category, weight) rules from the configured JSON file."""
+    with open(risk_settings.RISK_RULES_PATH, encoding="utf-8") as rules_file:
+        rules = json.load(rules_file)
+    return {keyword.lower(): (rule["category"], float(rule["weight"])) for keyword, rule in rules.items()}
+
+@lru_cache(maxsize=1)
+def build_risk_matcher() -> PatternMatcher:
+    return PatternMatcher((keyword, keyword) for keyword in load_risk_rules())
+
+
+def normalize(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else list(vector)
+
+def dot(a: Sequence[float], b: Sequence[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+def screen_clause(text: str, embedding: Optional[Sequence[float]], prototypes: List[List[float]]) -> Dict[str, Any]:
+    """
+    Scores one clause with the cheap heuristics: summed weights of the rule
+    keywords it contains, plus its closest similarity to a risk prototype.
+    The embedding and prototypes must already be normalized.
+    """
+    rules = load_risk_rules()
+    keywords = build_risk_matcher().find(text.lower())
+    score = sum(rules[keyword][1] for keyword in keywords)
+    categories = sorted({rules[keyword][0] for keyword in keywords})
+
+    similarity = 0.0
+    if embedding is not None and prototypes:
+        similarity = max(dot(embedding, prototype) for prototype in prototypes)
+
+    return {"score": score, "categories": categories, "keywords": sorted(keywords), "similarity": similarity}
+
+def is_candidate(screen: Dict[str, Any]) -> bool:
+    return (
+        screen["score"] >= risk_settings.RISK_MIN_SCORE
+        or screen["similarity"] >= risk_settings.RISK_PROTOTYPE_SIMILARITY
+    )
+
+def pair_conflicts(
+    documents_by_id: Dict[str, str],
+    neighbours: Dict[str, List[Tuple[str, float]]],
+    texts: Optional[Dict[str, str]] = None
+) -> Dict[str, List[str]]:
+    """
+    Turns each clause's nearest neighbours into symmetric pairs between
+    clauses of different documents that are similar enough to conflict.
+    Given the clause `texts`, copies identical up to case and whitespace
+    are not paired, as they cannot disagree; near-duplicates that differ
+    in any word, such as the governing law named, still are.
+    """
+    pairs: Dict[str, Set[str]] = {}
+    for clause_id, hits in neighbours.items():
+        for other_id, similarity in hits:
+            if similarity < risk_settings.RISK_CONFLICT_SIMILARITY:
+                continue
+            if documents_by_id.get(other_id) in (None, documents_by_id[clause_id]):
+                continue
+            if texts and normalize_text(texts[clause_id]) == normalize_text(texts[other_id]):
+                continue
+            pairs.setdefault(clause_id, set()).add(other_id)
+            pairs.setdefault(other_id, set()).add(clause_id)
+    return {clause_id: sorted(others) for clause_id, others in pairs.items()}
+
+def select_candidates(screens: Dict[str, Dict[str, Any]], conflicts: Dict[str, List[str]]) -> List[str]:
+    """
+    Picks the clauses worth an LLM call: heuristic hits and clauses paired
+    with a similar clause elsewhere, highest score first, capped at
+    RISK_MAX_CANDIDATES.
+    """
+    candidates = [
+        clause_id for clause_id, screen in screens.items()
+        if is_candidate(screen) or clause_id in conflicts
+    ]
+    candidates.sort(key=lambda clause_id: (
+        -screens[clause_id]["score"],
+        -len(conflicts.get(clause_id, [])),
+        -screens[clause_id]["similarity"],
+        clause_id,
+    ))
+    return candidates[:risk_settings.RISK_MAX_CANDIDATES]
+
+def heuristic_risk_level(screen: Dict[str, Any], conflict_count: int) -> str:
+    """Risk level implied by the screening alone, for when the LLM gives no usable answer."""
+    score = screen["score"] + (1.0 if conflict_count else 0.0)
+    if score >= 3.0:
+        return "High"
+    if score >= risk_settings.RISK_MIN_SCORE:
+        return "Medium"
+    return "Low"
+
+def parse_risk_response(llm_response: str, conflict_ids: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Reads the JSON object the risk prompt asks for. Returns None when the
+    model judged the clause harmless; raises ValueError if the response is
+    unusable. Conflicts are given as 1-based indexes into `conflict_ids`.
+    """
+    data = structured_output.parse_json_object(llm_response)
+
+    level = str(data.get("risk_level", "")).strip().capitalize()
+    if level == "None":
+        return None
+    if level not in RISK_LEVELS:
+        raise ValueError(f"Unknown risk level: {level}")
+
+    conflicts = []
+    for index in data.get("conflicts_with") or []:
+        if isinstance(index, int) and 1 <= index <= len(conflict_ids):
+            conflicts.append(conflict_ids[index - 1])
+    return {"risk_level": level, "explanation": str(data.get("explanation", "")).strip(), "conflicts_with": conflicts}
@@ -1,6 +1,9 @@
 # backend/dependencies/db_connector.py
 
-from neo4j import GraphDatabase, Driver
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+from neo4j import AsyncDriver, AsyncGraphDatabase, GraphDatabase, Driver
 from chromadb import Client, Settings
 from chromadb.utils.embedding_functions import EmbeddingFunction, SentenceTransformerEmbeddingFunction
 from chromadb.api import ClientAPI
@@ -8,8 +11,9 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 import logging
 import os
 import chromadb
-from chromadb.api import ClientAPI
-from chromadb import HttpClient
+from chromadb import AsyncHttpClient, HttpClient
+from chromadb.api import AsyncClientAPI
+import httpx
 
 # Pydantic model for loading database credentials from a .env file
 class DBSettings(BaseSettings):
@@ -23,33 +27,112 @@ class DBSettings(BaseSettings):
     NEO4J_USER: str = "neo4j"
     NEO4J_PASSWORD: str = "password"
 
+    # Connection pool shared by all sessions of one driver
+    NEO4J_MAX_POOL_SIZE: int = 50
+    NEO4J_ACQUISITION_TIMEOUT: float = 30.0
+    NEO4J_CONNECTION_TIMEOUT: float = 10.0
+    NEO4J_MAX_CONNECTION_LIFETIME: int = 3600
+    NEO4J_MAX_RETRY_TIME: float = 15.0
+
     CHROMA_HOST: str = "localhost"
     CHROMA_PORT: int = 8000
-    
-# Initialize global connection variables
+    # HTTP keep-alive pool, per-call timeout and retries for transient failures
+    CHROMA_MAX_CONNECTIONS: int = 32
+    CHROMA_MAX_KEEPALIVE_CONNECTIONS: int = 16
+    CHROMA_KEEPALIVE_SECONDS: float = 40.0
+    CHROMA_TIMEOUT_SECONDS: float = 30.0
+    CHROMA_MAX_RETRIES: int = 3
+    CHROMA_RETRY_BACKOFF_SECONDS: float = 0.5
+
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2.0
+
+# Initialize global connection variables. The sync clients serve the
+# ingestion worker threads; the async ones serve the request handlers.
 neo4j_driver: Driver = None
+neo4j_async_driver: Optional[AsyncDriver] = None
 chroma_client: ClientAPI = None
+chroma_async_client: Optional[AsyncClientAPI] = None
 db_settings = DBSettings()
 
-# ... (rest of the Neo4j functions are unchanged) ...
+T = TypeVar("T")
+
+# Network-level failures worth retrying; anything else is raised at once
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError, asyncio.TimeoutError, httpx.TransportError)
+
+def _neo4j_driver_options() -> Dict[str, Any]:
+    return {
+        "auth": (db_settings.NEO4J_USER, db_settings.NEO4J_PASSWORD),
+        "max_connection_pool_size": db_settings.NEO4J_MAX_POOL_SIZE,
+        "connection_acquisition_timeout": db_settings.NEO4J_ACQUISITION_TIMEOUT,
+        "connection_timeout": db_settings.NEO4J_CONNECTION_TIMEOUT,
+        "max_connection_lifetime": db_settings.NEO4J_MAX_CONNECTION_LIFETIME,
+        "max_transaction_retry_time": db_settings.NEO4J_MAX_RETRY_TIME,
+    }
+
+def _chroma_settings() -> Settings:
+    return Settings(
+        anonymized_telemetry=False,
+        chroma_http_max_connections=db_settings.CHROMA_MAX_CONNECTIONS,
+        chroma_http_max_keepalive_connections=db_settings.CHROMA_MAX_KEEPALIVE_CONNECTIONS,
+        chroma_http_keepalive_secs=db_settings.CHROMA_KEEPALIVE_SECONDS,
+    )
+
 def connect_to_neo4j():
     """Connects to the Neo4j database."""
     global neo4j_driver
     try:
-        neo4j_driver = GraphDatabase.driver(
-            db_settings.NEO4J_URI,
-            auth=(db_settings.NEO4J_USER, db_settings.NEO4J_PASSWORD)
-        )
+        neo4j_driver = GraphDatabase.driver(db_settings.NEO4J_URI, **_neo4j_driver_options())
         neo4j_driver.verify_connectivity()
         logging.info("Connected to Neo4j successfully!")
+        ensure_neo4j_constraints()
     except Exception as e:
         logging.error(f"Failed to connect to Neo4j: {e}")
         neo4j_driver = None
 
+# Uniqueness constraints also back the MERGE lookups with an index
+NEO4J_CONSTRAINTS = [
+    "CREATE CONSTRAINT project_id IF NOT EXISTS FOR (p:Project) REQUIRE p.id IS UNIQUE",
+    "CREATE CONSTRAINT document_identity IF NOT EXISTS FOR (d:Document) REQUIRE (d.project_id, d.name) IS UNIQUE",
+]
+
+def ensure_neo4j_constraints():
+    """Creates the graph's uniqueness constraints if they do not exist yet."""
+    if not neo4j_driver:
+        return
+    try:
+        with neo4j_driver.session() as session:
+            for statement in NEO4J_CONSTRAINTS:
+                session.run(statement)
+        logging.info("Neo4j constraints ensured.")
+    except Exception as e:
+        logging.error(f"Failed to create Neo4j constraints: {e}")
+
 def get_neo4j_driver():
     """Returns the Neo4j driver instance."""
     return neo4j_driver
 
+async def connect_to_neo4j_async():
+    """Opens the async Neo4j driver used by request handlers."""
+    global neo4j_async_driver
+    try:
+        neo4j_async_driver = AsyncGraphDatabase.driver(db_settings.NEO4J_URI, **_neo4j_driver_options())
+        await neo4j_async_driver.verify_connectivity()
+        logging.info("Connected to Neo4j (async) successfully!")
+    except Exception as e:
+        logging.error(f"Failed to connect to Neo4j (async): {e}")
+        neo4j_async_driver = None
+
+def get_neo4j_async_driver() -> Optional[AsyncDriver]:
+    """Returns the async Neo4j driver instance."""
+    return neo4j_async_driver
+
+async def disconnect_from_neo4j_async():
+    global neo4j_async_driver
+    if neo4j_async_driver:
+        await neo4j_async_driver.close()
+        neo4j_async_driver = None
+        logging.info("Disconnected from Neo4j (async).")
+
 def disconnect_from_neo4j():
     """Disconnects from the Neo4j database."""
     global neo4j_driver
@@ -66,6 +149,7 @@ def connect_to_chroma():
         chroma_client = HttpClient(
             host=db_settings.CHROMA_HOST,
             port=db_settings.CHROMA_PORT,
+            settings=_chroma_settings(),
         )
         # Ping the server to verify the connection
         chroma_client.heartbeat()
@@ -82,4 +166,116 @@ def disconnect_from_chroma():
     """Disconnects from the ChromaDB database."""
     global chroma_client
     chroma_client = None
-    logging.info("Disconnected from ChromaDB.")
\ No newline at end of file
+    logging.info("Disconnected from ChromaDB.")
+
+async def connect_to_chroma_async():
+    """Opens the async ChromaDB client used by request handlers."""
+    global chroma_async_client
+    try:
+        chroma_async_client = await AsyncHttpClient(
+            host=db_settings.CHROMA_HOST,
+            port=db_settings.CHROMA_PORT,
+            settings=_chroma_settings(),
+        )
+        await chroma_async_client.heartbeat()
+        logging.info("Connected to ChromaDB (async) successfully!")
+    except Exception as e:
+        logging.error(f"Failed to connect to ChromaDB (async): {e}")
+        chroma_async_client = None
+
+def get_chroma_async_client() -> Optional[AsyncClientAPI]:
+    """Returns the async ChromaDB client instance."""
+    return chroma_async_client
+
+def disconnect_from_chroma_async():
+    global chroma_async_client
+    chroma_async_client = None
+    logging.info("Disconnected from ChromaDB (async).")
+
+# --- Retries and timeouts ---
+def _backoff(attempt: int) -> float:
+    return db_settings.CHROMA_RETRY_BACKOFF_SECONDS * (2 ** attempt)
+
+def with_chroma_retries(operation: Callable[[], T]) -> T:
+    """Runs a synchronous Chroma call, retrying transient failures with exponential backoff."""
+    for attempt in range(db_settings.CHROMA_MAX_RETRIES + 1):
+        try:
+            return operation()
+        except TRANSIENT_ERRORS as e:
+            if attempt == db_settings.CHROMA_MAX_RETRIES:
+                raise
+            logging.warning(f"ChromaDB call failed ({e}); retry {attempt + 1} of {db_settings.CHROMA_MAX_RETRIES}.")
+            time.sleep(_backoff(attempt))
+
+async def run_chroma(operation: Callable[[], Awaitable[T]]) -> T:
+    """
+    Runs an async Chroma call under CHROMA_TIMEOUT_SECONDS, retrying
+    transient failures and timeouts with exponential backoff.
+    """
+    for attempt in range(db_settings.CHROMA_MAX_RETRIES + 1):
+        try:
+            return await asyncio.wait_for(operation(), timeout=db_settings.CHROMA_TIMEOUT_SECONDS)
+        except TRANSIENT_ERRORS as e:
+            if attempt == db_settings.CHROMA_MAX_RETRIES:
+                raise
+            logging.warning(f"ChromaDB call failed ({e!r}); retry {attempt + 1} of {db_settings.CHROMA_MAX_RETRIES}.")
+            await asyncio.sleep(_backoff(attempt))
+
+async def _call_collection(collection_name: str, method: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs a read-only collection method without blocking the event loop:
+    through the async client when connected, otherwise through the sync
+    client on a worker thread. Raises ValueError if the collection does not exist.
+    """
+    if chroma_async_client:
+        async def read() -> Dict[str, Any]:
+            collection = await chroma_async_client.get_collection(name=collection_name)
+            return await getattr(collection, method)(**kwargs)
+        try:
+            return await run_chroma(read)
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception as e:
+            raise ValueError(f"Collection {collection_name} could not be read: {e}")
+
+    if not chroma_client:
+        raise ConnectionError("ChromaDB client is not connected.")
+
+    def read_sync() -> Dict[str, Any]:
+        return getattr(chroma_client.get_collection(name=collection_name), method)(**kwargs)
+    try:
+        return await asyncio.to_thread(with_chroma_retries, read_sync)
+    except TRANSIENT_ERRORS:
+        raise
+    except Exception as e:
+        raise ValueError(f"Collection {collection_name} could not be read: {e}")
+
+async def get_collection_records(collection_name: str, **get_kwargs) -> Dict[str, Any]:
+    """Async `collection.get`, with the client selection, timeout and retries of _call_collection."""
+    return await _call_collection(collection_name, "get", get_kwargs)
+
+async def query_collection(collection_name: str, **query_kwargs) -> Dict[str, Any]:
+    """Async `collection.query`, with the client selection, timeout and retries of _call_collection."""
+    return await _call_collection(collection_name, "query", query_kwargs)
+
+# --- Health checks ---
+async def _probe(check: Callable[[], Awaitable[Any]]) -> str:
+    try:
+        await asyncio.wait_for(check(), timeout=db_settings.HEALTH_CHECK_TIMEOUT_SECONDS)
+        return "ready"
+    except Exception as e:
+        logging.warning(f"Health check failed: {e!r}")
+        return "unreachable"
+
+async def check_health() -> Dict[str, str]:
+    """Pings each database over its async client and reports ready, unreachable or not_connected."""
+    neo4j_state, chroma_state = "not_connected", "not_connected"
+    if neo4j_async_driver:
+        neo4j_state = await _probe(neo4j_async_driver.verify_connectivity)
+    elif neo4j_driver:
+        neo4j_state = await _probe(lambda: asyncio.to_thread(neo4j_driver.verify_connectivity))
+    if chroma_async_client:
+        chroma_state = await _probe(chroma_async_client.heartbeat)
+    elif chroma_client:
+        chroma_state = await _probe(lambda: asyncio.to_thread(chroma_client.heartbeat))
+    return {"neo4j": neo4j_state, "chroma": chroma_state}
\ No newline at end of file
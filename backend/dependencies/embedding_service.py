@@ -0,0 +1,155 @@
+# backend/dependencies/embedding_service.py
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+from ..core import metrics
+
+
+# --- Pydantic model for loading embedding settings from a .env file ---
+class EmbeddingSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore'
+    )
+
+    EMBEDDING_MODEL_NAME: str = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_CACHE_PATH: str = "./data/embedding_cache.sqlite3"
+
+embedding_settings = EmbeddingSettings()
+
+
+class EmbeddingCache:
+    """Content-addressed on-disk store of embedding vectors, backed by SQLite."""
+
+    # SQLite limits the number of bound parameters per statement
+    _LOOKUP_CHUNK = 500
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), self._LOOKUP_CHUNK):
+                batch = keys[start:start + self._LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                )
+                for key, blob in rows:
+                    vector = array('f')
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array('f', vector).tobytes()) for key, vector in items.items()]
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingService(Embeddings):
+    """
+    Process-wide embedding model. Texts are embedded in fixed-size batches and
+    each vector is cached on disk under a hash of the model name and text, so
+    repeated chunks are only ever embedded once.
+    """
+
+    def __init__(self, model_name: str, batch_size: int, cache_path: Optional[str] = None, device: str = None):
+        # Deferred so that importing this module does not pull in torch
+        import torch
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+
+        if device is None:
+            device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.device = device
+        self._model = HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs={'device': device},
+            encode_kwargs={'batch_size': batch_size}
+        )
+        self._cache = EmbeddingCache(cache_path) if cache_path else None
+
+    def _cache_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._cache_key(text) for text in texts]
+        vectors = self._cache.get_many(list(set(keys))) if self._cache else {}
+
+        # Embed each distinct uncached text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+
+        if missing:
+            missing_keys = list(missing.keys())
+            new_vectors = {}
+            for start in range(0, len(missing_keys), self.batch_size):
+                batch_keys = missing_keys[start:start + self.batch_size]
+                with metrics.timed("embed_documents"):
+                    batch_vectors = self._model.embed_documents([missing[key] for key in batch_keys])
+                new_vectors.update(zip(batch_keys, batch_vectors))
+            if self._cache:
+                self._cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+
+        logging.info(f"Embedded {len(missing)} of {len(texts)} texts ({len(texts) - len(missing)} served from cache).")
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        with metrics.timed("embed_query"):
+            return self._model.embed_query(text)
+
+
+# --- Global embedding service ---
+_embedding_service: Optional[EmbeddingService] = None
+_service_lock = threading.Lock()
+
+def is_loaded() -> bool:
+    """Returns True once the shared embedding model has been loaded."""
+    return _embedding_service is not None
+
+def get_embedding_service() -> EmbeddingService:
+    """Returns the shared embedding service, loading the model on first use."""
+    global _embedding_service
+    if _embedding_service is None:
+        with _service_lock:
+            if _embedding_service is None:
+                _embedding_service = EmbeddingService(
+                    model_name=embedding_settings.EMBEDDING_MODEL_NAME,
+                    batch_size=embedding_settings.EMBEDDING_BATCH_SIZE,
+                    cache_path=embedding_settings.EMBEDDING_CACHE_PATH
+                )
+                logging.info(f"Embedding model '{embedding_settings.EMBEDDING_MODEL_NAME}' loaded.")
+    return _embedding_service
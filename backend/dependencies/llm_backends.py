@@ -0,0 +1,140 @@
+# backend/dependencies/llm_backends.py
+
+import importlib.util
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from ..core import metrics
+
+# Supported generation backends:
+#   cuda-4bit - NF4 weights via bitsandbytes; needs a CUDA GPU
+#   cpu-int8  - fp32 weights with torch dynamic int8 quantization of Linear layers
+#   cpu-fp32  - plain fp32 weights on CPU
+#   onnx      - ONNX Runtime export via optimum (optional dependency)
+BACKENDS = ("cuda-4bit", "cpu-int8", "cpu-fp32", "onnx")
+# Backends that run feature prompts one at a time on a cached prompt prefix
+# instead of batching them. Only the CPU torch backends qualify: a GPU
+# prefills a whole batch in parallel, so there serial generation would lose
+# the batching throughput, and ONNX Runtime manages its own past key/values.
+PREFIX_CACHE_BACKENDS = ("cpu-int8", "cpu-fp32")
+
+
+def resolve_backend(requested: str) -> str:
+    """Maps the configured backend to a concrete one; "auto" picks based on the hardware."""
+    if requested != "auto":
+        if requested not in BACKENDS:
+            raise ValueError(f"Unknown LLM backend '{requested}'. Expected one of {BACKENDS} or 'auto'.")
+        return requested
+
+    import torch
+    if torch.cuda.is_available() and importlib.util.find_spec("bitsandbytes") is not None:
+        return "cuda-4bit"
+    return "cpu-int8"
+
+
+def load_model(backend: str, model_id: str) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Loads a causal LM for the given backend. Returns the model and any extra
+    keyword arguments the text-generation pipeline needs (e.g. the device).
+    """
+    import torch
+    from transformers import AutoModelForCausalLM
+
+    if backend == "cuda-4bit":
+        from transformers import BitsAndBytesConfig
+
+        nf4_config = BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_quant_type="nf4",
+            bnb_4bit_use_double_quant=True,
+            bnb_4bit_compute_dtype=torch.bfloat16
+        )
+        model = AutoModelForCausalLM.from_pretrained(
+            model_id,
+            device_map="auto",
+            torch_dtype=torch.float16,
+            quantization_config=nf4_config
+        )
+        return model, {}
+
+    if backend == "cpu-int8":
+        model = AutoModelForCausalLM.from_pretrained(model_id, torch_dtype=torch.float32)
+        model.eval()
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model, {"device": "cpu"}
+
+    if backend == "cpu-fp32":
+        model = AutoModelForCausalLM.from_pretrained(model_id, torch_dtype=torch.float32)
+        model.eval()
+        return model, {"device": "cpu"}
+
+    if backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForCausalLM
+        except ImportError:
+            raise ImportError("The 'onnx' backend requires optimum[onnxruntime] to be installed.")
+        model = ORTModelForCausalLM.from_pretrained(model_id, export=True)
+        return model, {}
+
+    raise ValueError(f"Unknown LLM backend '{backend}'.")
+
+
+class GenerationStats(BaseCallbackHandler):
+    """
+    LangChain callback that times every LLM call and counts the tokens it
+    read and generated, so throughput can be reported per backend.
+    """
+
+    def __init__(self, tokenizer: Any):
+        self._tokenizer = tokenizer
+        self._lock = threading.Lock()
+        self._started: Dict[UUID, Tuple[float, int]] = {}
+        self.total_tokens = 0
+        self.total_seconds = 0.0
+        self.last_tokens_per_second = 0.0
+
+    def count_tokens(self, texts: List[str]) -> int:
+        return sum(len(self._tokenizer.encode(text, add_special_tokens=False)) for text in texts)
+
+    def record(self, tokens: int, seconds: float, prompt_tokens: int = 0) -> None:
+        with self._lock:
+            self.total_tokens += tokens
+            self.total_seconds += seconds
+            if seconds > 0:
+                self.last_tokens_per_second = tokens / seconds
+        metrics.record_generation(prompt_tokens, tokens, seconds)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any) -> None:
+        prompt_tokens = self.count_tokens(prompts)
+        with self._lock:
+            self._started[run_id] = (time.perf_counter(), prompt_tokens)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        started_at, prompt_tokens = started
+        seconds = time.perf_counter() - started_at
+        texts = [generation.text for generations in response.generations for generation in generations]
+        self.record(self.count_tokens(texts), seconds, prompt_tokens)
+        metrics.observe_stage("llm_generate", seconds)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._started.pop(run_id, None)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            average = self.total_tokens / self.total_seconds if self.total_seconds else 0.0
+            return {
+                "generated_tokens": self.total_tokens,
+                "generation_seconds": round(self.total_seconds, 3),
+                "tokens_per_second": round(average, 2),
+                "last_tokens_per_second": round(self.last_tokens_per_second, 2),
+            }
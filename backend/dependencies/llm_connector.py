@@ -1,17 +1,26 @@
 import logging
-from typing import Optional
-from langchain_community.llms import HuggingFacePipeline
-from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline, BitsAndBytesConfig
-from langchain_community.embeddings import HuggingFaceEmbeddings
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Union
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import Runnable
-from langchain.chains import RetrievalQA
-from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from ..core import ingestion
-from chromadb.api import ClientAPI
 from chromadb.utils.embedding_functions import EmbeddingFunction as ChromaEmbeddingFunctionBase
-import torch
+from . import db_connector, embedding_service, llm_backends
+from .prompt_cache import PromptPrefixCache
+from .structured_output import JsonConstraint
+from .embedding_service import EmbeddingService, get_embedding_service
+from ..core import metrics
+from ..core.retrieval import HybridRetriever
+
+# torch, transformers and the LangChain model wrappers are imported where
+# they are used, so importing this module (and starting the API) stays fast
+if TYPE_CHECKING:
+    from langchain_community.llms import HuggingFacePipeline
+    from langchain_community.vectorstores import Chroma
 
 # --- Pydantic model for loading LLM API keys from a .env file ---
 class LLMSettings(BaseSettings):
@@ -20,107 +29,366 @@ class LLMSettings(BaseSettings):
         env_file_encoding='utf-8',
         extra='ignore'
     )
-    VECTOR_DB_PATH: str = "./data/vector_db"
+    LLM_MODEL_ID: str = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"
+    # auto, cuda-4bit, cpu-int8, cpu-fp32 or onnx; auto picks from the hardware
+    LLM_BACKEND: str = "auto"
+    # Prompts fed to the pipeline per forward pass, and batches run at once
+    LLM_BATCH_SIZE: int = 4
+    LLM_MAX_CONCURRENCY: int = 2
+    # Seconds to wait for the next streamed token before giving up
+    LLM_STREAM_TIMEOUT: float = 120.0
+    # Per-project vector store handles and RAG chains kept in memory
+    RETRIEVER_CACHE_SIZE: int = 32
+    # Hybrid retrieval ranks RETRIEVER_CANDIDATES from each of BM25 and the
+    # vector store, then keeps the fused top RETRIEVER_TOP_K for the prompt
+    RETRIEVER_TOP_K: int = 3
+    RETRIEVER_CANDIDATES: int = 10
+    # Load models on a background thread at startup instead of on first use
+    LLM_WARM_UP: bool = True
+    # Reuse the prefilled attention state of fixed feature prompt prefixes (CPU backends only)
+    LLM_PREFIX_CACHE: bool = True
+    LLM_PREFIX_CACHE_SIZE: int = 8
+    LLM_PREFIX_MIN_TOKENS: int = 16
+    # Constrain feature outputs to their JSON schema and stop once the object
+    # closes; token-level enforcement also needs lm-format-enforcer
+    LLM_CONSTRAINED_DECODING: bool = True
     
 llm_settings = LLMSettings()
 
-# --- Global LLM and RAG chain variables ---
-local_llm: HuggingFacePipeline = None
-rag_chain: Optional[Runnable] = None
-vector_store: Optional[Chroma] = None
+# --- Global LLM and per-project RAG chain variables ---
+local_llm: Optional["HuggingFacePipeline"] = None
+# One of not_loaded, loading, ready or failed
+llm_status: str = "not_loaded"
+llm_backend: Optional[str] = None
+generation_stats: Optional[llm_backends.GenerationStats] = None
+prompt_prefix_cache: Optional[PromptPrefixCache] = None
+_llm_lock = threading.Lock()
+_project_vector_stores: "OrderedDict[str, Chroma]" = OrderedDict()
+_project_rag_chains: "OrderedDict[str, Runnable]" = OrderedDict()
+_project_cache_lock = threading.Lock()
+
+GENERATION_KWARGS = {"max_new_tokens": 512, "temperature": 0.2}
 
-# Custom class to make LangChain's embedding function compatible with ChromaDB
+RAG_PROMPT_TEMPLATE = (
+    "Context: {context}\n\n"
+    "Question: {question}\n\n"
+    "Helpful Answer:"
+)
+
+# Custom class to make the shared embedding service compatible with ChromaDB
 class ChromaEmbeddingFunction(ChromaEmbeddingFunctionBase):
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2", device: str = None):
-        if device is None:
-            device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        self._langchain_embeddings = HuggingFaceEmbeddings(model_name=model_name, model_kwargs={'device': device})
-        self.model_name = model_name
-        self.device = device
-
-    def __call__(self, texts: list[str]) -> list[list[float]]:
-        return self._langchain_embeddings.embed_documents(texts)
-    
+    def __init__(self, service: Optional[EmbeddingService] = None):
+        self._service = service or get_embedding_service()
+        self.model_name = self._service.model_name
+        self.device = self._service.device
+
+    def __call__(self, input: list[str]) -> list[list[float]]:
+        return self._service.embed_documents(input)
+
     def embed_query(self, query: str) -> list[float]:
-        return self._langchain_embeddings.embed_query(query)
-    
+        return self._service.embed_query(query)
+
     def name(self):
         return self.model_name
 
-def get_llm_for_entity_extraction() -> Optional[HuggingFacePipeline]:
+def get_llm_for_entity_extraction() -> Optional["HuggingFacePipeline"]:
     """Returns a new LLM instance for entity extraction tasks."""
     if not local_llm:
         initialize_llm() # Ensure LLM is initialized
     return local_llm
 
-def initialize_llm():
-    """Initializes the local LLM and the RAG chain."""
-    global local_llm, rag_chain, vector_store
-    
+def get_json_constraint(schema: Dict[str, Any]) -> Optional[JsonConstraint]:
+    """Returns schema-constrained generation settings, or None if the loaded LLM cannot take them."""
+    pipe = getattr(local_llm, "pipeline", None)
+    if not llm_settings.LLM_CONSTRAINED_DECODING or pipe is None:
+        return None
+    return JsonConstraint(pipe.tokenizer, schema)
+
+def generate_with_prefix(prefix: str, prompt: str, **generate_kwargs: Any) -> str:
+    """
+    Generates one completion through the prompt prefix cache, recording the
+    same stats and metrics as pipeline calls.
+    """
+    started = time.perf_counter()
+    text, prompt_tokens, output_tokens = prompt_prefix_cache.generate(
+        prefix, prompt, **GENERATION_KWARGS, **generate_kwargs
+    )
+    seconds = time.perf_counter() - started
+    metrics.observe_stage("llm_generate", seconds)
+    if generation_stats:
+        generation_stats.record(output_tokens, seconds, prompt_tokens)
+    return text
+
+def generate_batch(
+    prompts: List[str],
+    prefix: Optional[str] = None,
+    schema: Optional[Dict[str, Any]] = None
+) -> List[Union[str, Exception]]:
+    """
+    Generates completions for a batch of prompts in one pipeline pass.
+    If the batch fails, each prompt is retried on its own so a bad input
+    only costs its own result; failures are returned as exceptions in place.
+    When every prompt starts with `prefix` and a CPU backend is loaded, the
+    prompts instead run one at a time on top of the prefix's cached
+    attention state, trading batching for skipping the shared prefill.
+    That trade is expected to pay off only on CPU, where prefill is not
+    parallel across a batch; it has not been benchmarked (the benchmark
+    suite runs a stub LLM), so compare the llm_generate stage with
+    LLM_PREFIX_CACHE on and off before relying on it.
+    With a JSON `schema`, output is constrained to it and generation stops
+    as soon as the object closes; each result is then the JSON text.
+    """
+    llm = get_llm_for_entity_extraction()
+    if not llm:
+        raise ValueError("LLM not initialized.")
+
+    constraint = get_json_constraint(schema) if schema else None
+    if constraint:
+        prompts = [constraint.prompt(prompt) for prompt in prompts]
+
+    def finish(text: str) -> str:
+        return constraint.output(text) if constraint else text
+
+    def generate_kwargs() -> Dict[str, Any]:
+        return constraint.generate_kwargs() if constraint else {}
+
+    results: List[Union[str, Exception]] = []
+    if prefix and prompt_prefix_cache and all(prompt.startswith(prefix) for prompt in prompts):
+        for prompt in prompts:
+            try:
+                results.append(finish(generate_with_prefix(prefix, prompt, **generate_kwargs())))
+            except Exception as e:
+                logging.error(f"Prefix-cached generation failed: {e}")
+                results.append(e)
+        return results
+
     try:
-        # 1. Initialize the local LLM using Hugging Face
-        model_id = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"
-        
-        nf4_config = BitsAndBytesConfig(
-            load_in_4bit=True,
-            bnb_4bit_quant_type="nf4",
-            bnb_4bit_use_double_quant=True,
-            bnb_4bit_compute_dtype=torch.bfloat16
+        pipeline_kwargs = {"pipeline_kwargs": generate_kwargs()} if constraint else {}
+        return [finish(text) for text in llm.batch(prompts, **pipeline_kwargs)]
+    except Exception as e:
+        logging.warning(f"Batch generation failed, retrying {len(prompts)} prompts individually: {e}")
+
+    for prompt in prompts:
+        try:
+            pipeline_kwargs = {"pipeline_kwargs": generate_kwargs()} if constraint else {}
+            results.append(finish(llm.invoke(prompt, **pipeline_kwargs)))
+        except Exception as e:
+            results.append(e)
+    return results
+
+def stream_generate(prompt: str) -> Iterator[str]:
+    """
+    Yields generated text pieces as the model produces them, using the
+    pipeline's streamer. Generation runs on a background thread.
+    """
+    from transformers import TextIteratorStreamer
+
+    llm = get_llm_for_entity_extraction()
+    if not llm:
+        raise ValueError("LLM not initialized.")
+
+    pipe = llm.pipeline
+    streamer = TextIteratorStreamer(
+        pipe.tokenizer,
+        skip_prompt=True,
+        skip_special_tokens=True,
+        timeout=llm_settings.LLM_STREAM_TIMEOUT
+    )
+    errors: List[Exception] = []
+
+    def run_generation() -> None:
+        try:
+            pipe(prompt, streamer=streamer)
+        except Exception as e:
+            errors.append(e)
+            streamer.end()
+
+    started = time.perf_counter()
+    pieces: List[str] = []
+    thread = threading.Thread(target=run_generation, daemon=True)
+    thread.start()
+    for text in streamer:
+        if text:
+            pieces.append(text)
+            yield text
+    thread.join()
+
+    if errors:
+        raise errors[0]
+    seconds = time.perf_counter() - started
+    metrics.observe_stage("llm_stream", seconds)
+    if generation_stats:
+        generation_stats.record(
+            generation_stats.count_tokens(["".join(pieces)]),
+            seconds,
+            generation_stats.count_tokens([prompt])
         )
 
+def build_rag_prompt(context_documents: List[Document], question: str) -> str:
+    """Formats retrieved documents and a question the same way the "stuff" RAG chain does."""
+    context = "\n\n".join(doc.page_content for doc in context_documents)
+    return RAG_PROMPT_TEMPLATE.format(context=context, question=question)
+
+def _cache_put(cache: "OrderedDict[str, Any]", key: str, value: Any) -> None:
+    """Inserts into a bounded LRU cache. Caller holds the project cache lock."""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > llm_settings.RETRIEVER_CACHE_SIZE:
+        cache.popitem(last=False)
+
+def get_project_vector_store(project_id: str) -> Optional["Chroma"]:
+    """Returns a cached LangChain handle on a project's Chroma collection."""
+    from langchain_community.vectorstores import Chroma
+
+    with _project_cache_lock:
+        if project_id in _project_vector_stores:
+            _project_vector_stores.move_to_end(project_id)
+            return _project_vector_stores[project_id]
+
+    chroma_client = db_connector.get_chroma_client()
+    if not chroma_client:
+        logging.error("ChromaDB client is not connected.")
+        return None
+
+    vector_store = Chroma(
+        client=chroma_client,
+        collection_name=f"project_{project_id}",
+        embedding_function=get_embedding_service()
+    )
+    with _project_cache_lock:
+        _cache_put(_project_vector_stores, project_id, vector_store)
+    return vector_store
+
+def get_retriever(project_id: str) -> Optional[BaseRetriever]:
+    """Returns a hybrid BM25 + vector retriever scoped to one project's chunks."""
+    vector_store = get_project_vector_store(project_id)
+    if not vector_store:
+        return None
+    return HybridRetriever(
+        project_id=project_id,
+        vector_store=vector_store,
+        k=llm_settings.RETRIEVER_TOP_K,
+        candidate_k=llm_settings.RETRIEVER_CANDIDATES
+    )
+
+def evict_project(project_id: str) -> None:
+    """Drops cached retrieval handles for a project."""
+    with _project_cache_lock:
+        _project_vector_stores.pop(project_id, None)
+        _project_rag_chains.pop(project_id, None)
+
+def initialize_llm():
+    """Initializes the local LLM. Safe to call from several threads; the model loads once."""
+    global llm_status
+
+    with _llm_lock:
+        if local_llm is not None:
+            return
+        llm_status = "loading"
+        _load_llm()
+        llm_status = "ready" if local_llm is not None else "failed"
+
+def _load_llm():
+    """Loads the model and pipeline on the configured backend. Caller holds the LLM lock."""
+    global local_llm, llm_backend, generation_stats, prompt_prefix_cache
+
+    try:
+        from transformers import AutoTokenizer, pipeline
+        from langchain_community.llms import HuggingFacePipeline
+
+        # 1. Pick a backend that fits the hardware and load the model on it
+        model_id = llm_settings.LLM_MODEL_ID
+        backend = llm_backends.resolve_backend(llm_settings.LLM_BACKEND)
+
         tokenizer = AutoTokenizer.from_pretrained(model_id)
-        model = AutoModelForCausalLM.from_pretrained(
-            model_id, 
-            device_map="auto",
-            torch_dtype=torch.float16,
-            quantization_config=nf4_config
-        )
-        
+        # Batched generation needs a pad token, padded on the left for decoder-only models
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        tokenizer.padding_side = "left"
+        model, pipeline_kwargs = llm_backends.load_model(backend, model_id)
+
         pipe = pipeline(
-            "text-generation", 
-            model=model, 
-            tokenizer=tokenizer, 
-            max_new_tokens=512, 
-            temperature=0.2
-        )
-        local_llm = HuggingFacePipeline(pipeline=pipe)
-        
-        logging.info(f"Local LLM '{model_id}' initialized successfully!")
-
-        # 2. Initialize the embedding model and vector store
-        device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2", model_kwargs={'device': device})
-        vector_store = Chroma(
-            persist_directory=llm_settings.VECTOR_DB_PATH,
-            embedding_function=embeddings
-        )
-        
-        # 3. Define the RAG prompt template
-        rag_prompt = PromptTemplate(
-            template=(
-                "Context: {context}\n\n"
-                "Question: {question}\n\n"
-                "Helpful Answer:"
-            ),
-            input_variables=["context", "question"]
+            "text-generation",
+            model=model,
+            tokenizer=tokenizer,
+            **GENERATION_KWARGS,
+            **pipeline_kwargs
         )
-        
-        # 4. Create the Retrieval-Augmented Generation (RAG) chain
-        rag_chain = RetrievalQA.from_chain_type(
-            llm=local_llm,
-            chain_type="stuff",
-            retriever=vector_store.as_retriever(),
-            chain_type_kwargs={"prompt": rag_prompt}
+        generation_stats = llm_backends.GenerationStats(tokenizer)
+        local_llm = HuggingFacePipeline(
+            pipeline=pipe,
+            batch_size=llm_settings.LLM_BATCH_SIZE,
+            callbacks=[generation_stats]
         )
-        logging.info("RAG chain initialized.")
+        llm_backend = backend
+        if llm_settings.LLM_PREFIX_CACHE and backend in llm_backends.PREFIX_CACHE_BACKENDS:
+            prompt_prefix_cache = PromptPrefixCache(
+                model,
+                tokenizer,
+                max_entries=llm_settings.LLM_PREFIX_CACHE_SIZE,
+                min_tokens=llm_settings.LLM_PREFIX_MIN_TOKENS
+            )
+
+        logging.info(f"Local LLM '{model_id}' initialized successfully on the '{backend}' backend!")
 
     except Exception as e:
-        logging.error(f"Failed to initialize LLM or RAG chain: {e}")
+        logging.error(f"Failed to initialize LLM: {e}")
         local_llm = None
-        rag_chain = None
 
-def get_rag_chain() -> Optional[Runnable]:
-    """Returns the initialized RAG chain."""
-    if not rag_chain:
+def warm_up():
+    """Loads the embedding model and the LLM on a background thread."""
+    def load_models() -> None:
+        try:
+            get_embedding_service()
+        except Exception as e:
+            logging.error(f"Failed to load embedding model: {e}")
         initialize_llm()
-    return rag_chain
\ No newline at end of file
+
+    threading.Thread(target=load_models, name="model-warm-up", daemon=True).start()
+
+def get_llm_info() -> Dict[str, Any]:
+    """Reports the model, backend and generation throughput so far."""
+    return {
+        "model_id": llm_settings.LLM_MODEL_ID,
+        "backend": llm_backend,
+        "status": llm_status,
+        **(generation_stats.snapshot() if generation_stats else {}),
+        **(prompt_prefix_cache.snapshot() if prompt_prefix_cache else {}),
+    }
+
+def get_model_status() -> Dict[str, str]:
+    """Reports whether each model is loaded, for readiness checks."""
+    return {
+        "llm": llm_status,
+        "embeddings": "ready" if embedding_service.is_loaded() else "not_loaded",
+    }
+
+def get_rag_chain(project_id: str) -> Optional[Runnable]:
+    """Returns a RAG chain that retrieves only from the given project's documents."""
+    from langchain.chains import RetrievalQA
+
+    with _project_cache_lock:
+        if project_id in _project_rag_chains:
+            _project_rag_chains.move_to_end(project_id)
+            return _project_rag_chains[project_id]
+
+    llm = get_llm_for_entity_extraction()
+    retriever = get_retriever(project_id)
+    if not llm or not retriever:
+        return None
+
+    rag_prompt = PromptTemplate(
+        template=RAG_PROMPT_TEMPLATE,
+        input_variables=["context", "question"]
+    )
+    rag_chain = RetrievalQA.from_chain_type(
+        llm=llm,
+        chain_type="stuff",
+        retriever=retriever,
+        return_source_documents=True,
+        chain_type_kwargs={"prompt": rag_prompt}
+    )
+    with _project_cache_lock:
+        _cache_put(_project_rag_chains, project_id, rag_chain)
+    logging.info(f"RAG chain initialized for project {project_id}.")
+    return rag_chain
@@ -0,0 +1,111 @@
+# backend/dependencies/prompt_cache.py
+
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from ..core import metrics
+
+
+class PromptPrefixCache:
+    """
+    Keeps the token IDs and attention key/value cache of fixed prompt
+    prefixes, such as a feature's instruction block, so a prompt starting
+    with one only prefills its own tail. Entries are computed once and
+    deep-copied for each generation, which extends the cache in place.
+    """
+
+    def __init__(self, model: Any, tokenizer: Any, max_entries: int, min_tokens: int):
+        self._model = model
+        self._tokenizer = tokenizer
+        self._max_entries = max_entries
+        # Shorter shared prefixes are not worth copying a cache for
+        self._min_tokens = min_tokens
+        self._entries: "OrderedDict[str, Tuple[List[int], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reused_tokens = 0
+
+    def _encode(self, text: str) -> List[int]:
+        return self._tokenizer(text)["input_ids"]
+
+    def _get_entry(self, prefix: str) -> Tuple[List[int], Any]:
+        """Returns the prefix's token IDs and attention cache, prefilling it on first use."""
+        import torch
+        from transformers import DynamicCache
+
+        with self._lock:
+            if prefix in self._entries:
+                self._entries.move_to_end(prefix)
+                return self._entries[prefix]
+
+            started = time.perf_counter()
+            token_ids = self._encode(prefix)
+            input_ids = torch.tensor([token_ids], device=self._model.device)
+            with torch.no_grad():
+                output = self._model(input_ids=input_ids, past_key_values=DynamicCache(), use_cache=True)
+            entry = (token_ids, output.past_key_values)
+            metrics.observe_stage("llm_prefix_prefill", time.perf_counter() - started)
+            logging.info(f"Cached the attention state of a {len(token_ids)}-token prompt prefix.")
+
+            self._entries[prefix] = entry
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            return entry
+
+    def generate(self, prefix: str, prompt: str, **generate_kwargs: Any) -> Tuple[str, int, int]:
+        """
+        Generates a completion of `prompt`, reusing the cached state of
+        `prefix` for the tokens the two share. Returns the generated text
+        and the prompt and output token counts.
+        """
+        import torch
+
+        prefix_ids, prefix_cache = self._get_entry(prefix)
+        prompt_ids = self._encode(prompt)
+
+        # Tokens at the prefix boundary may merge differently in the full
+        # prompt, so only the leading tokens that match exactly are reused.
+        # One prompt token is always left for the model to read.
+        shared = 0
+        for prefix_id, prompt_id in zip(prefix_ids, prompt_ids[:-1]):
+            if prefix_id != prompt_id:
+                break
+            shared += 1
+
+        kwargs: Dict[str, Any] = {}
+        if shared >= self._min_tokens:
+            cache = copy.deepcopy(prefix_cache)
+            cache.crop(shared)
+            kwargs["past_key_values"] = cache
+        with self._lock:
+            if kwargs:
+                self.hits += 1
+                self.reused_tokens += shared
+            else:
+                self.misses += 1
+
+        input_ids = torch.tensor([prompt_ids], device=self._model.device)
+        with torch.no_grad():
+            output = self._model.generate(
+                input_ids=input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                pad_token_id=self._tokenizer.pad_token_id,
+                **kwargs,
+                **generate_kwargs
+            )
+        new_tokens = output[0, len(prompt_ids):]
+        return self._tokenizer.decode(new_tokens, skip_special_tokens=True), len(prompt_ids), len(new_tokens)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "prefix_cache_entries": len(self._entries),
+                "prefix_cache_hits": self.hits,
+                "prefix_cache_misses": self.misses,
+                "prefix_reused_tokens": self.reused_tokens,
+            }
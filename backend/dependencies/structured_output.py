@@ -0,0 +1,185 @@
+# backend/dependencies/structured_output.py
+
+import importlib.util
+import json
+import logging
+from typing import Any, Dict, Optional, Sequence, Type
+
+from pydantic import BaseModel
+
+# Token-level schema enforcement needs lm-format-enforcer, an optional
+# dependency. Without it, output is still steered into the schema by
+# starting the answer with its first key, and still cut off as soon as
+# the JSON object closes.
+_enforcer_available = importlib.util.find_spec("lmformatenforcer") is not None
+_enforcer_tokenizer_data: Dict[int, Any] = {}
+
+
+def output_schema(
+    model: Type[BaseModel],
+    fields: Sequence[str],
+    overrides: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Builds the JSON schema the LLM is asked to fill from a response model:
+    only the named fields, all required, in that order, with `overrides`
+    merged into individual properties (e.g. an enum or an item limit).
+    Fields the server fills in itself are left out, so the model does not
+    spend tokens on them.
+    """
+    properties = model.model_json_schema()["properties"]
+    selected = {}
+    for name in fields:
+        prop = {key: value for key, value in properties[name].items() if key != "title"}
+        # Optional[X] fields are generated as plain X
+        if "anyOf" in prop:
+            prop.update(next(option for option in prop.pop("anyOf") if option.get("type") != "null"))
+            prop.pop("default", None)
+        selected[name] = {**prop, **(overrides or {}).get(name, {})}
+    return {"type": "object", "properties": selected, "required": list(fields), "additionalProperties": False}
+
+def format_instructions(schema: Dict[str, Any]) -> str:
+    return f"Respond with only a JSON object that matches this JSON schema:\n{json.dumps(schema)}"
+
+def json_prefill(schema: Dict[str, Any]) -> str:
+    """The start of the answer, up to the first key's value, e.g. '{"risk_level":'."""
+    return '{' + json.dumps(next(iter(schema["properties"]))) + ':'
+
+def extract_json_object(text: str) -> str:
+    """Returns the first balanced top-level JSON object in `text`; raises ValueError if none closes."""
+    scanner = JsonObjectScanner()
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("No JSON object in model output.")
+    for position in range(start, len(text)):
+        if scanner.feed(text[position]):
+            return text[start:position + 1]
+    raise ValueError("Unterminated JSON object in model output.")
+
+def parse_json_object(text: str) -> Dict[str, Any]:
+    return json.loads(extract_json_object(text))
+
+
+class JsonObjectScanner:
+    """Tracks brace depth outside JSON strings, character by character, to spot where an object closes."""
+
+    def __init__(self, depth: int = 0):
+        self.depth = depth
+        self.started = depth > 0
+        self.in_string = False
+        self.escaped = False
+        self.closed = False
+
+    def feed(self, text: str) -> bool:
+        """Consumes text and returns True once the top-level object has closed."""
+        for char in text:
+            if self.closed:
+                break
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = self.started
+            elif char == "{" or (char == "[" and self.started):
+                self.depth += 1
+                self.started = True
+            elif char in "}]" and self.started:
+                self.depth -= 1
+                self.closed = self.depth == 0
+        return self.closed
+
+
+def _build_stopping_criteria(tokenizer: Any, depth: int) -> Any:
+    import torch
+    from transformers import StoppingCriteria
+
+    class JsonObjectStoppingCriteria(StoppingCriteria):
+        """
+        Ends each sequence once its generated JSON object closes, rather
+        than letting the model chatter on to max_new_tokens. Only newly
+        generated tokens are scanned, one decoded token at a time.
+        """
+
+        def __init__(self):
+            self._prompt = None
+
+        def _reset(self, input_ids: "torch.LongTensor") -> None:
+            # The pipeline may reuse one criteria object for several generate() calls
+            self._prompt = input_ids[:, :-1].clone()
+            self._scanners = [JsonObjectScanner(depth) for _ in range(input_ids.shape[0])]
+            self._consumed = [input_ids.shape[1] - 1] * input_ids.shape[0]
+
+        def __call__(self, input_ids: "torch.LongTensor", scores: "torch.FloatTensor", **kwargs) -> "torch.BoolTensor":
+            prompt_length = self._prompt.shape[1] if self._prompt is not None else 0
+            if (
+                self._prompt is None
+                or input_ids.shape[0] != self._prompt.shape[0]
+                or input_ids.shape[1] <= prompt_length
+                or not torch.equal(input_ids[:, :prompt_length], self._prompt)
+            ):
+                self._reset(input_ids)
+
+            for row, scanner in enumerate(self._scanners):
+                for token_id in input_ids[row, self._consumed[row]:].tolist():
+                    scanner.feed(tokenizer.decode([token_id], skip_special_tokens=True))
+                self._consumed[row] = input_ids.shape[1]
+            return torch.tensor([scanner.closed for scanner in self._scanners], dtype=torch.bool, device=input_ids.device)
+
+    return JsonObjectStoppingCriteria()
+
+def _build_prefix_allowed_tokens_fn(tokenizer: Any, schema: Dict[str, Any]) -> Any:
+    from lmformatenforcer import JsonSchemaParser
+    from lmformatenforcer.integrations.transformers import (
+        build_token_enforcer_tokenizer_data,
+        build_transformers_prefix_allowed_tokens_fn,
+    )
+
+    # Indexing the vocabulary is slow, so it is done once per tokenizer
+    key = id(tokenizer)
+    if key not in _enforcer_tokenizer_data:
+        _enforcer_tokenizer_data[key] = build_token_enforcer_tokenizer_data(tokenizer)
+    return build_transformers_prefix_allowed_tokens_fn(_enforcer_tokenizer_data[key], JsonSchemaParser(schema))
+
+
+class JsonConstraint:
+    """
+    Schema-constrained generation settings for one batch of prompts. With
+    lm-format-enforcer installed, every generated token must keep the
+    output valid under the schema; otherwise the answer is prefilled up to
+    the first key. Either way generation stops when the object closes.
+    """
+
+    def __init__(self, tokenizer: Any, schema: Dict[str, Any], enforce: bool = True):
+        self.tokenizer = tokenizer
+        self.schema = schema
+        # The prefill is only dropped once enforcement is known to work
+        self._prefix_allowed_tokens_fn = None
+        if enforce and _enforcer_available:
+            try:
+                self._prefix_allowed_tokens_fn = _build_prefix_allowed_tokens_fn(tokenizer, schema)
+            except Exception as e:
+                logging.warning(f"Schema enforcement unavailable, falling back to prefill only: {e}")
+        self.enforced = self._prefix_allowed_tokens_fn is not None
+        self.prefill = "" if self.enforced else json_prefill(schema)
+
+    def prompt(self, prompt: str) -> str:
+        return prompt + self.prefill
+
+    def output(self, generated_text: str) -> str:
+        return self.prefill + generated_text
+
+    def generate_kwargs(self) -> Dict[str, Any]:
+        """Fresh generate() arguments; the stopping criteria hold per-call state."""
+        from transformers import StoppingCriteriaList
+
+        depth = 1 if self.prefill else 0
+        kwargs: Dict[str, Any] = {
+            "stopping_criteria": StoppingCriteriaList([_build_stopping_criteria(self.tokenizer, depth)])
+        }
+        if self.enforced:
+            kwargs["prefix_allowed_tokens_fn"] = self._prefix_allowed_tokens_fn
+        return kwargs
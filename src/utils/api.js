@@ -11,13 +11,43 @@ const api = axios.create({
 // API endpoints
 export const API_ENDPOINTS = {
   UPLOAD: '/upload/',
+  JOBS: '/jobs',
   FEATURES: '/features/',
   DIAGRAM: '/diagram',
   CHATBOT: '/chatbot/',
 };
 
-// Upload documents
-export const uploadDocuments = async (files) => {
+const JOB_POLL_INTERVAL_MS = 1000;
+
+// Get ingestion job status
+export const getJobStatus = async (jobId) => {
+  try {
+    const response = await api.get(`${API_ENDPOINTS.JOBS}/${jobId}`);
+    return response.data;
+  } catch (error) {
+    throw new Error(error.response?.data?.detail || 'Failed to get job status');
+  }
+};
+
+// Poll an ingestion job until it completes or fails
+export const waitForJob = async (jobId, onProgress) => {
+  while (true) {
+    const job = await getJobStatus(jobId);
+    if (onProgress) {
+      onProgress(job);
+    }
+    if (job.status === 'completed') {
+      return job;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Document processing failed');
+    }
+    await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+};
+
+// Upload documents and wait for processing to finish
+export const uploadDocuments = async (files, onProgress) => {
   const formData = new FormData();
   files.forEach(file => {
     formData.append('files', file);
@@ -29,9 +59,10 @@ export const uploadDocuments = async (files) => {
         'Content-Type': 'multipart/form-data',
       },
     });
+    await waitForJob(response.data.job_id, onProgress);
     return response.data;
   } catch (error) {
-    throw new Error(error.response?.data?.detail || 'Failed to upload documents');
+    throw new Error(error.response?.data?.detail || error.message || 'Failed to upload documents');
   }
 };
 
@@ -48,11 +79,20 @@ export const runFeature = async (projectId, featureName) => {
   }
 };
 
-// Get relationship diagram
+// Get relationship diagram, following the cursor until every page is loaded
 export const getRelationshipDiagram = async (projectId) => {
   try {
-    const response = await api.get(`${API_ENDPOINTS.DIAGRAM}/${projectId}`);
-    return response.data;
+    const diagram = { project_id: projectId, nodes: [], edges: [] };
+    let cursor = null;
+    do {
+      const response = await api.get(`${API_ENDPOINTS.DIAGRAM}/${projectId}`, {
+        params: cursor ? { cursor } : {},
+      });
+      diagram.nodes.push(...response.data.nodes);
+      diagram.edges.push(...response.data.edges);
+      cursor = response.data.next_cursor;
+    } while (cursor);
+    return diagram;
   } catch (error) {
     throw new Error(error.response?.data?.detail || 'Failed to get diagram');
   }